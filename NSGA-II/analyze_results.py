@@ -4,28 +4,113 @@ Genera solo las gráficas esenciales para el informe
 """
 
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import os
+import hashlib
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
 
 # Configuración
 plt.rcParams['font.size'] = 11
-plt.rcParams['figure.dpi'] = 300
+plt.rcParams['figure.dpi'] = 150
+DPI_DEFAULT = 150   # evoluciones e histogramas
+DPI_TRADEOFF = 300  # gráficas de trade-off del informe
 sns.set_style("whitegrid")
 
+
+# Codificación PNG en hilos: las figuras se rasterizan en el hilo principal
+# y la compresión (Pillow libera el GIL) se hace en paralelo
+_png_writer = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+_png_jobs = []
+
+
+def _write_png(path, rgba, dpi, compress_level):
+    Image.fromarray(rgba).save(path, dpi=(dpi, dpi), compress_level=compress_level)
+
+
+def save_rasterized(fig, path, crops=None, compress_level=3):
+    """
+    Rasteriza la figura (una sola pasada de dibujo, sin bbox 'tight') y
+    encola la escritura del PNG. Con crops=[(ax, ruta), ...] guarda además
+    un recorte por cada Axes a partir del mismo buffer.
+    """
+    fig.canvas.draw()
+    # Copia: el canvas se reutiliza para la siguiente gráfica
+    rgba = np.array(fig.canvas.buffer_rgba())
+    dpi = fig.dpi
+    _png_jobs.append(_png_writer.submit(_write_png, path, rgba, dpi, compress_level))
+
+    height = rgba.shape[0]
+    renderer = fig.canvas.get_renderer()
+    for ax_c, crop_path in crops or []:
+        bbox = ax_c.get_tightbbox(renderer).padded(0.1 * dpi)
+        x0, x1 = max(0, int(bbox.x0)), min(rgba.shape[1], int(np.ceil(bbox.x1)))
+        y0, y1 = max(0, int(height - bbox.y1)), min(height, int(np.ceil(height - bbox.y0)))
+        _png_jobs.append(_png_writer.submit(_write_png, crop_path, rgba[y0:y1, x0:x1].copy(),
+                                            dpi, compress_level))
+
+
+def wait_png_writes():
+    """Espera a que terminen todas las escrituras (propaga errores)"""
+    for job in _png_jobs:
+        job.result()
+    _png_jobs.clear()
+
+
 # Crear carpeta Img si no existe
 os.makedirs('Img', exist_ok=True)
 
+IMAGES = [
+    'Img/tradeoffs.png',
+    'Img/ipc_vs_energy.png', 'Img/ipc_vs_edp.png', 'Img/energy_vs_edp.png',
+    'Img/evolution_ipc.png', 'Img/evolution_energy.png', 'Img/evolution_edp.png',
+    'Img/histogram_ipc.png', 'Img/histogram_energy.png', 'Img/histogram_edp.png',
+]
+
 print("="*70)
 print("ANÁLISIS DE RESULTADOS NSGA-II")
 print("="*70)
 
 # ===== CARGAR DATOS =====
-df = pd.read_csv("nsga2_results.csv")
-df_valid = df[df['ipc'] > 0].copy()
+def load_results(path):
+    """
+    Lee el CSV y filtra las simulaciones válidas (ipc > 0).
+
+    Con pyarrow la lectura (multihilo) y el filtro se hacen en Arrow y solo
+    las filas válidas pasan a pandas; el índice conserva el número de fila
+    original, que es el que se muestra como número de simulación.
+    timestamp se mantiene como texto para que pareto_configurations.csv
+    salga igual que el original.
 
-print(f"\nSimulaciones totales: {len(df)}")
+    Returns:
+        (total de simulaciones, DataFrame con las válidas)
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        df = pd.read_csv(path)
+        return len(df), df[df['ipc'] > 0]
+
+    table = pa_csv.read_csv(
+        path,
+        convert_options=pa_csv.ConvertOptions(column_types={'timestamp': pa.string()}),
+    )
+    valid = pc.greater(table['ipc'], 0).to_numpy(zero_copy_only=False)
+    df_valid = table.filter(valid).to_pandas()
+    df_valid.index = np.flatnonzero(valid)
+    return table.num_rows, df_valid
+
+
+n_total, df_valid = load_results("nsga2_results.csv")
+
+print(f"\nSimulaciones totales: {n_total}")
 print(f"Simulaciones válidas: {len(df_valid)}")
 
 # ===== IDENTIFICAR FRONTERA DE PARETO =====
@@ -33,39 +118,143 @@ print("\n" + "="*70)
 print("IDENTIFICANDO FRONTERA DE PARETO")
 print("="*70)
 
-def find_pareto_front(df):
+def _skyline_mask(order, ipc, energy_rank, edp_rank):
+    """
+    Barrido skyline sobre los puntos ordenados por IPC descendente.
+
+    Un árbol de Fenwick indexado por el rango de Energy guarda el menor
+    rango de EDP entre los puntos no dominados ya insertados, así que
+    "¿existe alguien con más IPC y Energy <= e y EDP <= d?" cuesta O(log n).
+    """
+    n = len(order)
+    m = 0
+    for i in range(n):
+        if energy_rank[i] > m:
+            m = energy_rank[i]
+    empty = n + 1  # centinela: ningún punto insertado en ese prefijo
+    tree = np.full(m + 1, empty, dtype=np.int64)
+    is_pareto = np.ones(n, dtype=np.bool_)
+
+    start = 0
+    while start < n:
+        # Grupo de puntos con el mismo IPC
+        end = start + 1
+        while end < n and ipc[order[end]] == ipc[order[start]]:
+            end += 1
+
+        # 1) Dominados por algún punto con IPC estrictamente mayor
+        for k in range(start, end):
+            i = order[k]
+            r = energy_rank[i]
+            best = empty
+            while r > 0:
+                if tree[r] < best:
+                    best = tree[r]
+                r -= r & -r
+            if best <= edp_rank[i]:
+                is_pareto[i] = False
+
+        # 2) Dentro del grupo (mismo IPC): dominancia en Energy/EDP
+        for k in range(start, end):
+            i = order[k]
+            for l in range(start, end):
+                j = order[l]
+                if (energy_rank[j] <= energy_rank[i] and edp_rank[j] <= edp_rank[i]
+                        and (energy_rank[j] < energy_rank[i] or edp_rank[j] < edp_rank[i])):
+                    is_pareto[i] = False
+                    break
+
+        # 3) Insertar los no dominados del grupo en el árbol
+        for k in range(start, end):
+            i = order[k]
+            if is_pareto[i]:
+                r = energy_rank[i]
+                while r <= m:
+                    if edp_rank[i] < tree[r]:
+                        tree[r] = edp_rank[i]
+                    r += r & -r
+
+        start = end
+
+    return is_pareto
+
+
+def _get_skyline_kernel():
+    """
+    Compila _skyline_mask con Numba si está instalado (caché en disco);
+    si no, se usa la versión en Python puro.
+    """
+    global _skyline_kernel
+    if _skyline_kernel is None:
+        try:
+            from numba import njit
+            _skyline_kernel = njit(cache=True)(_skyline_mask)
+        except ImportError:
+            _skyline_kernel = _skyline_mask
+    return _skyline_kernel
+
+
+_skyline_kernel = None
+
+
+def find_pareto_front(ipc, energy, edp):
     """
     Encuentra frontera de Pareto:
     - Maximizar IPC
     - Minimizar Energy
     - Minimizar EDP
-    """
-    is_pareto = np.ones(len(df), dtype=bool)
-    
-    for i in range(len(df)):
-        if is_pareto[i]:
-            for j in range(len(df)):
-                if i != j and is_pareto[j]:
-                    # j domina a i si es mejor o igual en todo y estrictamente mejor en algo
-                    ipc_better = df.iloc[j]['ipc'] >= df.iloc[i]['ipc']
-                    energy_better = df.iloc[j]['energy'] <= df.iloc[i]['energy']
-                    edp_better = df.iloc[j]['edp'] <= df.iloc[i]['edp']
-                    
-                    strictly_better = (
-                        df.iloc[j]['ipc'] > df.iloc[i]['ipc'] or
-                        df.iloc[j]['energy'] < df.iloc[i]['energy'] or
-                        df.iloc[j]['edp'] < df.iloc[i]['edp']
-                    )
-                    
-                    if ipc_better and energy_better and edp_better and strictly_better:
-                        is_pareto[i] = False
-                        break
-    
-    return is_pareto
 
-pareto_mask = find_pareto_front(df_valid)
-pareto = df_valid[pareto_mask].copy()
-dominated = df_valid[~pareto_mask].copy()
+    Recibe los objetivos como arrays NumPy (no el DataFrame). Ordena por
+    IPC y barre manteniendo los mínimos de Energy/EDP (skyline),
+    O(n log n) en lugar de comparar todos contra todos.
+    """
+    # Rangos (1-based) para indexar el árbol sin depender de inf/NaN
+    energy_rank = np.unique(energy, return_inverse=True)[1].astype(np.int64) + 1
+    edp_rank = np.unique(edp, return_inverse=True)[1].astype(np.int64) + 1
+
+    order = np.argsort(-ipc, kind='stable')
+    return _get_skyline_kernel()(order, ipc, energy_rank, edp_rank)
+
+# Vistas NumPy de los objetivos, extraídas una sola vez
+sim_ids = df_valid.index.to_numpy()
+ipc = df_valid['ipc'].to_numpy(dtype=np.float64)
+energy = df_valid['energy'].to_numpy(dtype=np.float64)
+edp = df_valid['edp'].to_numpy(dtype=np.float64)
+
+# Caché en disco de la frontera: un único fichero con la clave (mtime+tamaño
+# del CSV) de la que sale; otro CSV lo sobrescribe
+csv_stat = os.stat("nsga2_results.csv")
+cache_key = hashlib.blake2b(f"{csv_stat.st_mtime_ns}:{csv_stat.st_size}".encode(),
+                            digest_size=16).hexdigest()
+CACHE_DIR = os.path.join('Img', '.cache')
+cache_file = os.path.join(CACHE_DIR, 'pareto.pkl')
+# Clave del CSV con el que se dibujaron las gráficas actuales de Img/
+images_key_file = os.path.join(CACHE_DIR, 'images.key')
+
+
+def _read_cache(path):
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+cached = _read_cache(cache_file)
+if cached is not None and cached.get('key') == cache_key:
+    pareto_mask = cached['pareto_mask']
+    print("(frontera cargada de caché)")
+else:
+    pareto_mask = find_pareto_front(ipc, energy, edp)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_file, 'wb') as f:
+        pickle.dump({'key': cache_key, 'pareto_mask': pareto_mask}, f)
+    # Versiones anteriores dejaban un <hash>.pkl por cada CSV
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith('.pkl') and name != 'pareto.pkl':
+            os.remove(os.path.join(CACHE_DIR, name))
+pareto = df_valid[pareto_mask]
+dominated = df_valid[~pareto_mask]
 
 print(f"Configuraciones en frontera de Pareto: {len(pareto)}")
 print(f"Configuraciones dominadas: {len(dominated)}")
@@ -79,33 +268,42 @@ print("\n" + "="*70)
 print("ESTADÍSTICAS DE LA FRONTERA DE PARETO")
 print("="*70)
 
+# Todas las estadísticas en una sola pasada por columna
+OBJECTIVES = ['ipc', 'energy', 'edp']
+pareto_stats = pareto[OBJECTIVES].agg(['min', 'max', 'mean'])
+valid_mean = df_valid[OBJECTIVES].mean()
+
 print(f"\nRangos:")
-print(f"  IPC:    [{pareto['ipc'].min():.4f}, {pareto['ipc'].max():.4f}]")
-print(f"  Energy: [{pareto['energy'].min():.4f}, {pareto['energy'].max():.4f}] J")
-print(f"  EDP:    [{pareto['edp'].min():.4f}, {pareto['edp'].max():.4f}]")
+print(f"  IPC:    [{pareto_stats.at['min', 'ipc']:.4f}, {pareto_stats.at['max', 'ipc']:.4f}]")
+print(f"  Energy: [{pareto_stats.at['min', 'energy']:.4f}, {pareto_stats.at['max', 'energy']:.4f}] J")
+print(f"  EDP:    [{pareto_stats.at['min', 'edp']:.4f}, {pareto_stats.at['max', 'edp']:.4f}]")
 
 # Encontrar mejores individuales
-best_ipc_idx = pareto['ipc'].idxmax()
-best_energy_idx = pareto['energy'].idxmin()
-best_edp_idx = pareto['edp'].idxmin()
+pareto_pos = np.flatnonzero(pareto_mask)
+best_ipc_pos = pareto_pos[np.argmax(ipc[pareto_pos])]
+best_energy_pos = pareto_pos[np.argmin(energy[pareto_pos])]
+best_edp_pos = pareto_pos[np.argmin(edp[pareto_pos])]
+best_ipc_idx = sim_ids[best_ipc_pos]
+best_energy_idx = sim_ids[best_energy_pos]
+best_edp_idx = sim_ids[best_edp_pos]
 
 print(f"\nMejor IPC:")
 print(f"   Simulación: {best_ipc_idx}")
-print(f"   IPC:    {pareto.loc[best_ipc_idx, 'ipc']:.4f}")
-print(f"   Energy: {pareto.loc[best_ipc_idx, 'energy']:.4f} J")
-print(f"   EDP:    {pareto.loc[best_ipc_idx, 'edp']:.4f}")
+print(f"   IPC:    {ipc[best_ipc_pos]:.4f}")
+print(f"   Energy: {energy[best_ipc_pos]:.4f} J")
+print(f"   EDP:    {edp[best_ipc_pos]:.4f}")
 
 print(f"\nMejor Energy:")
 print(f"   Simulación: {best_energy_idx}")
-print(f"   IPC:    {pareto.loc[best_energy_idx, 'ipc']:.4f}")
-print(f"   Energy: {pareto.loc[best_energy_idx, 'energy']:.4f} J")
-print(f"   EDP:    {pareto.loc[best_energy_idx, 'edp']:.4f}")
+print(f"   IPC:    {ipc[best_energy_pos]:.4f}")
+print(f"   Energy: {energy[best_energy_pos]:.4f} J")
+print(f"   EDP:    {edp[best_energy_pos]:.4f}")
 
 print(f"\nMejor EDP (RECOMENDADO - Mejor trade-off):")
 print(f"   Simulación: {best_edp_idx}")
-print(f"   IPC:    {pareto.loc[best_edp_idx, 'ipc']:.4f}")
-print(f"   Energy: {pareto.loc[best_edp_idx, 'energy']:.4f} J")
-print(f"   EDP:    {pareto.loc[best_edp_idx, 'edp']:.4f}")
+print(f"   IPC:    {ipc[best_edp_pos]:.4f}")
+print(f"   Energy: {energy[best_edp_pos]:.4f} J")
+print(f"   EDP:    {edp[best_edp_pos]:.4f}")
 
 # Mostrar configuración del mejor EDP
 print(f"\n📋 Configuración del mejor trade-off (EDP):")
@@ -121,190 +319,182 @@ print("\n" + "="*70)
 print("GENERANDO GRÁFICAS")
 print("="*70)
 
-# ===== 1. IPC vs ENERGY =====
-plt.figure(figsize=(10, 7))
-plt.scatter(dominated['ipc'], dominated['energy'], 
-           alpha=0.4, s=50, c='lightgray', edgecolors='gray', 
-           linewidth=0.5, label='Dominadas')
-plt.scatter(pareto['ipc'], pareto['energy'], 
-           s=150, c='red', edgecolors='black', linewidth=2, 
-           label='Frontera de Pareto', zorder=10)
-
-# Marcar mejor trade-off (EDP)
-plt.scatter(best_config['ipc'], best_config['energy'],
-           s=400, c='gold', marker='*', edgecolors='black', 
-           linewidth=2.5, label=f'Mejor EDP (sim #{best_edp_idx})', zorder=15)
-
-plt.xlabel('IPC', fontsize=14, fontweight='bold')
-plt.ylabel('Energy (J)', fontsize=14, fontweight='bold')
-plt.title('Trade-off: IPC vs Energy', fontsize=16, fontweight='bold')
-plt.legend(fontsize=11, loc='best')
-plt.grid(alpha=0.3)
-plt.tight_layout()
-plt.savefig('Img/ipc_vs_energy.png', bbox_inches='tight')
-print("Img/ipc_vs_energy.png")
-plt.close()
-
-# ===== 2. IPC vs EDP =====
-plt.figure(figsize=(10, 7))
-plt.scatter(dominated['ipc'], dominated['edp'], 
-           alpha=0.4, s=50, c='lightgray', edgecolors='gray', 
-           linewidth=0.5, label='Dominadas')
-plt.scatter(pareto['ipc'], pareto['edp'], 
-           s=150, c='red', edgecolors='black', linewidth=2, 
-           label='Frontera de Pareto', zorder=10)
-plt.scatter(best_config['ipc'], best_config['edp'],
-           s=400, c='gold', marker='*', edgecolors='black', 
-           linewidth=2.5, label=f'Mejor EDP (sim #{best_edp_idx})', zorder=15)
-
-plt.xlabel('IPC', fontsize=14, fontweight='bold')
-plt.ylabel('EDP', fontsize=14, fontweight='bold')
-plt.title('Trade-off: IPC vs EDP', fontsize=16, fontweight='bold')
-plt.legend(fontsize=11, loc='best')
-plt.grid(alpha=0.3)
-plt.tight_layout()
-plt.savefig('Img/ipc_vs_edp.png', bbox_inches='tight')
-print("Img/ipc_vs_edp.png")
-plt.close()
-
-# ===== 3. ENERGY vs EDP =====
-plt.figure(figsize=(10, 7))
-plt.scatter(dominated['energy'], dominated['edp'], 
-           alpha=0.4, s=50, c='lightgray', edgecolors='gray', 
-           linewidth=0.5, label='Dominadas')
-plt.scatter(pareto['energy'], pareto['edp'], 
-           s=150, c='red', edgecolors='black', linewidth=2, 
-           label='Frontera de Pareto', zorder=10)
-plt.scatter(best_config['energy'], best_config['edp'],
-           s=400, c='gold', marker='*', edgecolors='black', 
-           linewidth=2.5, label=f'Mejor EDP (sim #{best_edp_idx})', zorder=15)
-
-plt.xlabel('Energy (J)', fontsize=14, fontweight='bold')
-plt.ylabel('EDP', fontsize=14, fontweight='bold')
-plt.title('Trade-off: Energy vs EDP', fontsize=16, fontweight='bold')
-plt.legend(fontsize=11, loc='best')
-plt.grid(alpha=0.3)
-plt.tight_layout()
-plt.savefig('Img/energy_vs_edp.png', bbox_inches='tight')
-print("Img/energy_vs_edp.png")
-plt.close()
-
-# ===== 4. EVOLUCIÓN DE IPC (SOLO PUNTOS) =====
-plt.figure(figsize=(12, 6))
-plt.scatter(df_valid.index, df_valid['ipc'], 
-           alpha=0.5, s=40, c='steelblue', edgecolors='darkblue', linewidth=0.5)
-plt.axhline(y=pareto['ipc'].max(), color='green', linestyle='--', 
-           linewidth=2, label=f'Mejor IPC: {pareto["ipc"].max():.4f} (sim #{best_ipc_idx})')
-plt.axhline(y=df_valid['ipc'].mean(), color='orange', linestyle='--', 
-           linewidth=2, label=f'Media: {df_valid["ipc"].mean():.4f}')
-plt.xlabel('Número de simulación', fontsize=14, fontweight='bold')
-plt.ylabel('IPC', fontsize=14, fontweight='bold')
-plt.title('Evolución del IPC a través de las simulaciones', 
-         fontsize=16, fontweight='bold')
-plt.legend(fontsize=11)
-plt.grid(alpha=0.3)
-plt.tight_layout()
-plt.savefig('Img/evolution_ipc.png', bbox_inches='tight')
-print("Img/evolution_ipc.png")
-plt.close()
-
-# ===== 5. EVOLUCIÓN DE ENERGY (SOLO PUNTOS) =====
-plt.figure(figsize=(12, 6))
-plt.scatter(df_valid.index, df_valid['energy'], 
-           alpha=0.5, s=40, c='coral', edgecolors='darkred', linewidth=0.5)
-plt.axhline(y=pareto['energy'].min(), color='green', linestyle='--', 
-           linewidth=2, label=f'Mejor Energy: {pareto["energy"].min():.4f} J (sim #{best_energy_idx})')
-plt.axhline(y=df_valid['energy'].mean(), color='orange', linestyle='--', 
-           linewidth=2, label=f'Media: {df_valid["energy"].mean():.4f} J')
-plt.xlabel('Número de simulación', fontsize=14, fontweight='bold')
-plt.ylabel('Energy (J)', fontsize=14, fontweight='bold')
-plt.title('Evolución de Energy a través de las simulaciones', 
-         fontsize=16, fontweight='bold')
-plt.legend(fontsize=11)
-plt.grid(alpha=0.3)
-plt.tight_layout()
-plt.savefig('Img/evolution_energy.png', bbox_inches='tight')
-print("Img/evolution_energy.png")
-plt.close()
-
-# ===== 6. EVOLUCIÓN DE EDP (SOLO PUNTOS) =====
-plt.figure(figsize=(12, 6))
-plt.scatter(df_valid.index, df_valid['edp'], 
-           alpha=0.5, s=40, c='purple', edgecolors='darkviolet', linewidth=0.5)
-plt.axhline(y=pareto['edp'].min(), color='green', linestyle='--', 
-           linewidth=2, label=f'Mejor EDP: {pareto["edp"].min():.4f} (sim #{best_edp_idx})')
-plt.axhline(y=df_valid['edp'].mean(), color='orange', linestyle='--', 
-           linewidth=2, label=f'Media: {df_valid["edp"].mean():.4f}')
-plt.xlabel('Número de simulación', fontsize=14, fontweight='bold')
-plt.ylabel('EDP', fontsize=14, fontweight='bold')
-plt.title('Evolución del EDP a través de las simulaciones', 
-         fontsize=16, fontweight='bold')
-plt.legend(fontsize=11)
-plt.grid(alpha=0.3)
-plt.tight_layout()
-plt.savefig('Img/evolution_edp.png', bbox_inches='tight')
-print("Img/evolution_edp.png")
-plt.close()
-
-# ===== 7. HISTOGRAMA IPC =====
-plt.figure(figsize=(10, 6))
-plt.hist(df_valid['ipc'], bins=30, alpha=0.7, color='steelblue', 
-         edgecolor='black', linewidth=1.2)
-plt.axvline(x=pareto['ipc'].mean(), color='red', linestyle='--', 
-           linewidth=2.5, label=f'Media Pareto: {pareto["ipc"].mean():.4f}')
-plt.axvline(x=df_valid['ipc'].mean(), color='orange', linestyle='--', 
-           linewidth=2.5, label=f'Media total: {df_valid["ipc"].mean():.4f}')
-plt.xlabel('IPC', fontsize=14, fontweight='bold')
-plt.ylabel('Frecuencia', fontsize=14, fontweight='bold')
-plt.title('Distribución de IPC', fontsize=16, fontweight='bold')
-plt.legend(fontsize=11)
-plt.grid(alpha=0.3, axis='y')
-plt.tight_layout()
-plt.savefig('Img/histogram_ipc.png', bbox_inches='tight')
-print("Img/histogram_ipc.png")
-plt.close()
-
-# ===== 8. HISTOGRAMA ENERGY =====
-plt.figure(figsize=(10, 6))
-plt.hist(df_valid['energy'], bins=30, alpha=0.7, color='coral', 
-         edgecolor='black', linewidth=1.2)
-plt.axvline(x=pareto['energy'].mean(), color='red', linestyle='--', 
-           linewidth=2.5, label=f'Media Pareto: {pareto["energy"].mean():.4f} J')
-plt.axvline(x=df_valid['energy'].mean(), color='orange', linestyle='--', 
-           linewidth=2.5, label=f'Media total: {df_valid["energy"].mean():.4f} J')
-plt.xlabel('Energy (J)', fontsize=14, fontweight='bold')
-plt.ylabel('Frecuencia', fontsize=14, fontweight='bold')
-plt.title('Distribución de Energy', fontsize=16, fontweight='bold')
-plt.legend(fontsize=11)
-plt.grid(alpha=0.3, axis='y')
-plt.tight_layout()
-plt.savefig('Img/histogram_energy.png', bbox_inches='tight')
-print("Img/histogram_energy.png")
-plt.close()
-
-# ===== 9. HISTOGRAMA EDP =====
-plt.figure(figsize=(10, 6))
-plt.hist(df_valid['edp'], bins=30, alpha=0.7, color='purple', 
-         edgecolor='black', linewidth=1.2)
-plt.axvline(x=pareto['edp'].mean(), color='red', linestyle='--', 
-           linewidth=2.5, label=f'Media Pareto: {pareto["edp"].mean():.4f}')
-plt.axvline(x=df_valid['edp'].mean(), color='orange', linestyle='--', 
-           linewidth=2.5, label=f'Media total: {df_valid["edp"].mean():.4f}')
-plt.xlabel('EDP', fontsize=14, fontweight='bold')
-plt.ylabel('Frecuencia', fontsize=14, fontweight='bold')
-plt.title('Distribución de EDP', fontsize=16, fontweight='bold')
-plt.legend(fontsize=11)
-plt.grid(alpha=0.3, axis='y')
-plt.tight_layout()
-plt.savefig('Img/histogram_edp.png', bbox_inches='tight')
-print(" Img/histogram_edp.png")
-plt.close()
+# Gráficas dibujadas con este mismo CSV (clave guardada junto a ellas) y
+# todas presentes: no hace falta volver a dibujarlas
+try:
+    with open(images_key_file) as f:
+        images_key = f.read().strip()
+except OSError:
+    images_key = None
+skip_plots = images_key == cache_key and all(os.path.exists(img) for img in IMAGES)
+
+if skip_plots:
+    print("Gráficas al día (CSV sin cambios), se omiten")
+else:
+    # ===== 1-3. TRADE-OFFS (una figura 1x3, un solo dibujo) =====
+    # Objetivos de dominadas/Pareto en arrays (columnas: ipc, energy, edp)
+    dom_obj = np.column_stack([ipc[~pareto_mask], energy[~pareto_mask], edp[~pareto_mask]])
+    par_obj = np.column_stack([ipc[pareto_mask], energy[pareto_mask], edp[pareto_mask]])
+    best_obj = np.array([ipc[best_edp_pos], energy[best_edp_pos], edp[best_edp_pos]])
+
+    tradeoffs = [
+        # (columna x, columna y, etiqueta x, etiqueta y, título, archivo)
+        (0, 1, 'IPC', 'Energy (J)', 'Trade-off: IPC vs Energy', 'Img/ipc_vs_energy.png'),
+        (0, 2, 'IPC', 'EDP', 'Trade-off: IPC vs EDP', 'Img/ipc_vs_edp.png'),
+        (1, 2, 'Energy (J)', 'EDP', 'Trade-off: Energy vs EDP', 'Img/energy_vs_edp.png'),
+    ]
+
+    fig_t, axes = plt.subplots(1, 3, figsize=(30, 7), dpi=DPI_TRADEOFF)
+    for ax_t, (xi, yi, xlabel, ylabel, title, _) in zip(axes, tradeoffs):
+        ax_t.scatter(dom_obj[:, xi], dom_obj[:, yi],
+                     alpha=0.4, s=50, c='lightgray', edgecolors='gray',
+                     linewidth=0.5, label='Dominadas', rasterized=True)
+        ax_t.scatter(par_obj[:, xi], par_obj[:, yi],
+                     s=150, c='red', edgecolors='black', linewidth=2,
+                     label='Frontera de Pareto', zorder=10)
+        # Marcar mejor trade-off (EDP)
+        ax_t.scatter(best_obj[xi], best_obj[yi],
+                     s=400, c='gold', marker='*', edgecolors='black',
+                     linewidth=2.5, label=f'Mejor EDP (sim #{best_edp_idx})', zorder=15)
+        ax_t.set_xlabel(xlabel, fontsize=14, fontweight='bold')
+        ax_t.set_ylabel(ylabel, fontsize=14, fontweight='bold')
+        ax_t.set_title(title, fontsize=16, fontweight='bold')
+        ax_t.legend(fontsize=11, loc='best')
+        ax_t.grid(alpha=0.3)
+    fig_t.tight_layout()
+    # Cada trade-off individual es un recorte de la figura compuesta
+    save_rasterized(fig_t, 'Img/tradeoffs.png',
+                    crops=[(ax_t, filename) for ax_t, (*_, filename) in zip(axes, tradeoffs)])
+    print("Img/tradeoffs.png")
+    for *_, filename in tradeoffs:
+        print(filename)
+    plt.close(fig_t)
+
+    # Una sola figura/ejes reutilizada para el resto de gráficas (ax.cla() entre ellas)
+    fig, ax = plt.subplots(figsize=(12, 6))
+
+    # ===== 4. EVOLUCIÓN DE IPC (SOLO PUNTOS) =====
+    fig.set_size_inches(12, 6)
+    ax.scatter(df_valid.index, df_valid['ipc'], 
+               alpha=0.5, s=40, c='steelblue', edgecolors='darkblue', linewidth=0.5)
+    ax.axhline(y=pareto_stats.at['max', 'ipc'], color='green', linestyle='--', 
+               linewidth=2, label=f'Mejor IPC: {pareto_stats.at["max", "ipc"]:.4f} (sim #{best_ipc_idx})')
+    ax.axhline(y=valid_mean['ipc'], color='orange', linestyle='--', 
+               linewidth=2, label=f'Media: {valid_mean["ipc"]:.4f}')
+    ax.set_xlabel('Número de simulación', fontsize=14, fontweight='bold')
+    ax.set_ylabel('IPC', fontsize=14, fontweight='bold')
+    ax.set_title('Evolución del IPC a través de las simulaciones', 
+             fontsize=16, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+    save_rasterized(fig, 'Img/evolution_ipc.png')
+    print("Img/evolution_ipc.png")
+    ax.cla()
+
+    # ===== 5. EVOLUCIÓN DE ENERGY (SOLO PUNTOS) =====
+    fig.set_size_inches(12, 6)
+    ax.scatter(df_valid.index, df_valid['energy'], 
+               alpha=0.5, s=40, c='coral', edgecolors='darkred', linewidth=0.5)
+    ax.axhline(y=pareto_stats.at['min', 'energy'], color='green', linestyle='--', 
+               linewidth=2, label=f'Mejor Energy: {pareto_stats.at["min", "energy"]:.4f} J (sim #{best_energy_idx})')
+    ax.axhline(y=valid_mean['energy'], color='orange', linestyle='--', 
+               linewidth=2, label=f'Media: {valid_mean["energy"]:.4f} J')
+    ax.set_xlabel('Número de simulación', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Energy (J)', fontsize=14, fontweight='bold')
+    ax.set_title('Evolución de Energy a través de las simulaciones', 
+             fontsize=16, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+    save_rasterized(fig, 'Img/evolution_energy.png')
+    print("Img/evolution_energy.png")
+    ax.cla()
+
+    # ===== 6. EVOLUCIÓN DE EDP (SOLO PUNTOS) =====
+    fig.set_size_inches(12, 6)
+    ax.scatter(df_valid.index, df_valid['edp'], 
+               alpha=0.5, s=40, c='purple', edgecolors='darkviolet', linewidth=0.5)
+    ax.axhline(y=pareto_stats.at['min', 'edp'], color='green', linestyle='--', 
+               linewidth=2, label=f'Mejor EDP: {pareto_stats.at["min", "edp"]:.4f} (sim #{best_edp_idx})')
+    ax.axhline(y=valid_mean['edp'], color='orange', linestyle='--', 
+               linewidth=2, label=f'Media: {valid_mean["edp"]:.4f}')
+    ax.set_xlabel('Número de simulación', fontsize=14, fontweight='bold')
+    ax.set_ylabel('EDP', fontsize=14, fontweight='bold')
+    ax.set_title('Evolución del EDP a través de las simulaciones', 
+             fontsize=16, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+    save_rasterized(fig, 'Img/evolution_edp.png')
+    print("Img/evolution_edp.png")
+    ax.cla()
+
+    # ===== 7. HISTOGRAMA IPC =====
+    fig.set_size_inches(10, 6)
+    ax.hist(df_valid['ipc'], bins=30, alpha=0.7, color='steelblue', 
+             edgecolor='black', linewidth=1.2)
+    ax.axvline(x=pareto_stats.at['mean', 'ipc'], color='red', linestyle='--', 
+               linewidth=2.5, label=f'Media Pareto: {pareto_stats.at["mean", "ipc"]:.4f}')
+    ax.axvline(x=valid_mean['ipc'], color='orange', linestyle='--', 
+               linewidth=2.5, label=f'Media total: {valid_mean["ipc"]:.4f}')
+    ax.set_xlabel('IPC', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Frecuencia', fontsize=14, fontweight='bold')
+    ax.set_title('Distribución de IPC', fontsize=16, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(alpha=0.3, axis='y')
+    fig.tight_layout()
+    save_rasterized(fig, 'Img/histogram_ipc.png')
+    print("Img/histogram_ipc.png")
+    ax.cla()
+
+    # ===== 8. HISTOGRAMA ENERGY =====
+    fig.set_size_inches(10, 6)
+    ax.hist(df_valid['energy'], bins=30, alpha=0.7, color='coral', 
+             edgecolor='black', linewidth=1.2)
+    ax.axvline(x=pareto_stats.at['mean', 'energy'], color='red', linestyle='--', 
+               linewidth=2.5, label=f'Media Pareto: {pareto_stats.at["mean", "energy"]:.4f} J')
+    ax.axvline(x=valid_mean['energy'], color='orange', linestyle='--', 
+               linewidth=2.5, label=f'Media total: {valid_mean["energy"]:.4f} J')
+    ax.set_xlabel('Energy (J)', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Frecuencia', fontsize=14, fontweight='bold')
+    ax.set_title('Distribución de Energy', fontsize=16, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(alpha=0.3, axis='y')
+    fig.tight_layout()
+    save_rasterized(fig, 'Img/histogram_energy.png')
+    print("Img/histogram_energy.png")
+    ax.cla()
+
+    # ===== 9. HISTOGRAMA EDP =====
+    fig.set_size_inches(10, 6)
+    ax.hist(df_valid['edp'], bins=30, alpha=0.7, color='purple', 
+             edgecolor='black', linewidth=1.2)
+    ax.axvline(x=pareto_stats.at['mean', 'edp'], color='red', linestyle='--', 
+               linewidth=2.5, label=f'Media Pareto: {pareto_stats.at["mean", "edp"]:.4f}')
+    ax.axvline(x=valid_mean['edp'], color='orange', linestyle='--', 
+               linewidth=2.5, label=f'Media total: {valid_mean["edp"]:.4f}')
+    ax.set_xlabel('EDP', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Frecuencia', fontsize=14, fontweight='bold')
+    ax.set_title('Distribución de EDP', fontsize=16, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(alpha=0.3, axis='y')
+    fig.tight_layout()
+    save_rasterized(fig, 'Img/histogram_edp.png')
+    print(" Img/histogram_edp.png")
+    ax.cla()
+
+    plt.close(fig)
+    wait_png_writes()
+    with open(images_key_file, 'w') as f:
+        f.write(cache_key + "\n")
 
 # ===== RESUMEN FINAL =====
 print("\n" + "="*70)
 print("ARCHIVOS GENERADOS")
 print("="*70)
 print("\nTrade-offs (scatter plots):")
+print("   - Img/tradeoffs.png")
 print("   - Img/ipc_vs_energy.png")
 print("   - Img/ipc_vs_edp.png")
 print("   - Img/energy_vs_edp.png")
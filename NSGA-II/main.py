@@ -14,6 +14,7 @@ ARCHIVE_DIR = os.path.join(WORKSPACE, "P1_Arq/NSGA-II_Test/simulations_archive")
 N_CORES = 5        # Número de núcleos para paralelismo
 POP_SIZE = 30       # Individuos por generación
 N_GEN = 14           # Generaciones
+PRUNE_K_SIGMA = None  # Pareto-cache: margen en sigmas, p. ej. 3.0 (None = desactivado)
 
 
 
@@ -35,7 +36,8 @@ if __name__ == "__main__":
         archive_dir=ARCHIVE_DIR,  
         pop_size=POP_SIZE,
         n_gen=N_GEN,
-        n_cores=N_CORES  
+        n_cores=N_CORES,
+        prune_k_sigma=PRUNE_K_SIGMA
     )
     
     print("\nOptimización completada!")
@@ -1,6 +1,10 @@
 """
 Optimización multi-objetivo con NSGA-II
 """
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import os
+import time
 import numpy as np
 from pymoo.algorithms.moo.nsga2 import NSGA2
 from pymoo.core.problem import ElementwiseProblem
@@ -8,21 +12,154 @@ from pymoo.optimize import minimize
 from pymoo.operators.sampling.rnd import IntegerRandomSampling
 from pymoo.operators.crossover.sbx import SBX
 from pymoo.operators.mutation.pm import PM
-from multiprocessing.pool import Pool
-from pymoo.core.problem import StarmapParallelization
-from multiprocessing import Manager, Lock
 
 from design_space import DESIGN_SPACE, decode_individual, get_bounds
-from simulator import Gem5Simulator
+from simulator import get_worker_simulator, init_worker as init_worker_simulator
+from pareto_cache import get_pareto_cache
+
+
+# IDs de simulación sin lock: cada worker del pool recibe un rango fijo al
+# arrancar y numera sus simulaciones por striding. Como el pool recicla los
+# workers cada max_tasks tareas, el rango p ocupa la columna p % n_workers y
+# el bloque de filas (p // n_workers)·max_tasks ... + max_tasks - 1, así los
+# workers nuevos no repiten IDs. El estado vive en globales del módulo porque
+# pymoo serializa el problema en cada tarea.
+_worker_rank = 0
+_n_workers = 1
+_max_tasks = 1
+_local_count = 0
+
+
+# ===== AFINIDAD: UN WORKER (Y SU gem5) POR NÚCLEO FÍSICO =====
+def _parse_cpu_list(text):
+    """'0-3,8' -> {0, 1, 2, 3, 8}"""
+    cpus = set()
+    for part in text.strip().split(','):
+        if '-' in part:
+            lo, hi = part.split('-')
+            cpus.update(range(int(lo), int(hi) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
+def _physical_cores():
+    """Un hilo hardware por núcleo físico, entre las CPUs permitidas"""
+    allowed = os.sched_getaffinity(0)
+    cores = set()
+    for cpu in allowed:
+        path = f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list"
+        try:
+            with open(path) as f:
+                siblings = _parse_cpu_list(f.read()) & allowed
+        except (OSError, ValueError):
+            siblings = set()
+        cores.add(min(siblings or {cpu}))
+    return sorted(cores)
+
+
+def _pid_alive(pid):
+    """True si el proceso existe y no es zombie"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            state = f.read().rsplit(')', 1)[1].split()[0]
+    except (OSError, IndexError):
+        return False
+    return state not in ('Z', 'X')
+
+
+def _claim_core_slot(core_slots, timeout=2.0):
+    """
+    Reserva un hueco libre de la tabla de núcleos (pid del dueño, 0 = libre).
+    Un worker reciclado deja su hueco al morir; si aún está terminando se
+    reintenta un momento. Devuelve None si no se consigue.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        with core_slots.get_lock():
+            for slot, pid in enumerate(core_slots):
+                if pid == 0 or not _pid_alive(pid):
+                    core_slots[slot] = os.getpid()
+                    return slot
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.01)
+
+
+def _pin_worker(cores, core_slots):
+    """Fija este worker a un núcleo físico propio (gem5 lo hereda)"""
+    if not cores:
+        return
+    slot = _claim_core_slot(core_slots)
+    if slot is None:
+        return
+    try:
+        os.sched_setaffinity(0, {cores[slot]})
+    except OSError as e:
+        print(f"[Worker {os.getpid()}] No se pudo fijar afinidad: {e}")
+
+
+def _init_worker(rank_counter, n_workers, max_tasks, workspace_dir, results_log_file, archive_dir,
+                 cores=None, core_slots=None):
+    """
+    Initializer del pool: asigna a este worker su rango (una única vez),
+    lo fija a un núcleo físico y crea su Gem5Simulator persistente
+    """
+    global _worker_rank, _n_workers, _max_tasks, _local_count
+    _pin_worker(cores, core_slots)
+    init_worker_simulator(workspace_dir, results_log_file, archive_dir)
+    with rank_counter.get_lock():
+        _worker_rank = rank_counter.value
+        rank_counter.value += 1
+    _n_workers = n_workers
+    _max_tasks = max_tasks
+    _local_count = 0
+
+
+def _next_sim_id():
+    """Devuelve el siguiente ID de simulación de este worker (único global)"""
+    global _local_count
+    column = _worker_rank % _n_workers
+    row = (_worker_rank // _n_workers) * _max_tasks + _local_count
+    _local_count += 1
+    return 1 + column + row * _n_workers
+
+
+class FuturesParallelization:
+    """
+    Runner de pymoo sobre un ProcessPoolExecutor: cada individuo es un
+    future independiente, así un worker libre coge el siguiente aunque otro
+    siga con una simulación larga (las cachés grandes tardan más en gem5).
+    Los resultados se recogen según terminan y se devuelven en orden;
+    los candidatos que ha podado el Pareto-cache se cuentan por generación.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+
+    def __call__(self, f, X):
+        futures = {self.executor.submit(f, x): i for i, x in enumerate(X)}
+        results = [None] * len(X)
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+        # "pruned" no es una salida de pymoo: se retira antes de devolver
+        pruned = sum(bool(r.pop("pruned", False)) for r in results)
+        if pruned:
+            print(f"Pareto-cache: {pruned}/{len(X)} candidatos sin simular")
+        return results
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("executor", None)
+        return state
 
 
 class CacheOptimizationProblem(ElementwiseProblem):
-    def __init__(self, workspace_dir, results_log_file, archive_dir, sim_counter, counter_lock, **kwargs):  
+    def __init__(self, workspace_dir, results_log_file, archive_dir, prune_k_sigma=None, **kwargs):  
         self.workspace_dir = workspace_dir
         self.results_log_file = results_log_file
         self.archive_dir = archive_dir  
-        self.sim_counter = sim_counter
-        self.counter_lock = counter_lock
+        self.prune_k_sigma = prune_k_sigma
         
         n_params = len(DESIGN_SPACE)
         xl, xu = get_bounds()
@@ -39,24 +176,32 @@ class CacheOptimizationProblem(ElementwiseProblem):
     
     def _evaluate(self, x, out, *args, **kwargs):
         """Evalúa un individuo ejecutando gem5+McPAT"""
-        # Incrementar contador de forma thread-safe
-        with self.counter_lock:
-            sim_id = self.sim_counter.value
-            self.sim_counter.value += 1
-        
         config = decode_individual(x)
         
-        # ← pasar archive_dir al simulador
-        sim = Gem5Simulator(self.workspace_dir, self.results_log_file, self.archive_dir)
-        result = sim.run_simulation(config, sim_id=sim_id)
+        # Simulador del worker (creado en el initializer con archive_dir)
+        sim = get_worker_simulator(self.workspace_dir, self.results_log_file, self.archive_dir)
+        
+        # Configuración ya simulada: no repetir gem5+McPAT ni gastar sim_id
+        cached = sim.cached_result(config)
+        if cached is not None:
+            out["F"] = cached['F']
+            return
+        
+        # Pareto-cache: si la cota optimista ya está dominada, no simular y
+        # devolver una penalización dominada (nunca la cota, que no es medida)
+        if self.prune_k_sigma is not None:
+            pareto_cache = get_pareto_cache(self.results_log_file, self.prune_k_sigma)
+            if pareto_cache.dominated_bound(config) is not None:
+                out["F"] = pareto_cache.penalty()
+                out["pruned"] = True
+                return
         
-        metrics = result['metrics']
+        # ID único por striding, sin sincronizar con otros workers
+        sim_id = _next_sim_id()
+        
+        result = sim.run_simulation(config, sim_id=sim_id)
         
-        out["F"] = [
-            -metrics['ipc'],
-            metrics['energy'],
-            metrics['edp']
-        ]
+        out["F"] = result['F']
 
 
 class ArchitectureOptimization(ElementwiseProblem):
@@ -80,30 +225,20 @@ class ArchitectureOptimization(ElementwiseProblem):
     
     def _evaluate(self, x, out, *args, **kwargs):
         """Evalúa un individuo"""
-        with self.counter_lock:
-            sim_id = self.sim_counter.value
-            self.sim_counter.value += 1
+        sim_id = _next_sim_id()
         
         config = decode_individual(x)
         
         
-        sim = Gem5Simulator(self.workspace_dir, self.results_log_file, self.archive_dir)
+        sim = get_worker_simulator(self.workspace_dir, self.results_log_file, self.archive_dir)
         result = sim.run_simulation(config, sim_id=sim_id)
         
-        metrics = result['metrics']
-        
-        # NSGA-II minimiza, así que:
-        # - IPC: maximizar → minimizar su negativo
-        # - Energy: minimizar
-        # - EDP: minimizar
-        out["F"] = [
-            -metrics['ipc'],   # Minimizar negativo = maximizar IPC
-            metrics['energy'],
-            metrics['edp']
-        ]
-
-
-def run_optimization(workspace_dir, results_log_file, archive_dir=None, pop_size=30, n_gen=20, n_cores=6):
+        # NSGA-II minimiza, así que F = (-IPC, Energy, EDP)
+        out["F"] = result['F']
+
+
+def run_optimization(workspace_dir, results_log_file, archive_dir=None, pop_size=30, n_gen=20, n_cores=6,
+                     prune_k_sigma=None):
     """
     Ejecuta optimización NSGA-II
     
@@ -114,23 +249,41 @@ def run_optimization(workspace_dir, results_log_file, archive_dir=None, pop_size
         pop_size: tamaño población
         n_gen: número generaciones
         n_cores: núcleos paralelos
+        prune_k_sigma: margen (en sigmas) del Pareto-cache para no simular
+            candidatos dominados; None lo desactiva
     """
     # ===== CONFIGURAR PARALELIZACIÓN =====
-    pool = Pool(n_cores)
-    runner = StarmapParallelization(pool.starmap)
+    # Los workers se reciclan cada max_tasks evaluaciones para que la memoria
+    # (y lo que deje gem5 abierto) no crezca durante toda la ejecución; cada
+    # individuo se envía como un future. max_tasks_per_child necesita 'spawn'.
+    # El Value solo se usa al arrancar cada worker para repartir rangos.
+    max_tasks = max(1, pop_size // n_cores)
+    ctx = multiprocessing.get_context('spawn')
+    rank_counter = ctx.Value('i', 0)
+    
+    # Afinidad: cada worker ocupa un núcleo físico distinto (nunca dos gem5
+    # en hermanos hyperthread). Con menos núcleos físicos que workers no se
+    # fija nada y se deja hacer al planificador.
+    cores = _physical_cores()
+    if len(cores) < n_cores:
+        print(f"Afinidad desactivada: {len(cores)} núcleos físicos para {n_cores} workers")
+        cores = None
+    core_slots = ctx.Array('i', n_cores)
     
-    # ===== CREAR CONTADOR COMPARTIDO + LOCK =====
-    manager = Manager()
-    sim_counter = manager.Value('i', 1)
-    counter_lock = manager.Lock()
+    executor = ProcessPoolExecutor(max_workers=n_cores, mp_context=ctx,
+                                   initializer=_init_worker,
+                                   initargs=(rank_counter, n_cores, max_tasks,
+                                             workspace_dir, results_log_file, archive_dir,
+                                             cores, core_slots),
+                                   max_tasks_per_child=max_tasks)
+    runner = FuturesParallelization(executor)
     
     # Crear problema con paralelización Y archive_dir
     problem = CacheOptimizationProblem(
         workspace_dir=workspace_dir,
         results_log_file=results_log_file,
         archive_dir=archive_dir,  
-        sim_counter=sim_counter,
-        counter_lock=counter_lock,
+        prune_k_sigma=prune_k_sigma,
         elementwise_runner=runner
     )
     
@@ -155,8 +308,7 @@ def run_optimization(workspace_dir, results_log_file, archive_dir=None, pop_size
     )
     
     # Cerrar pool
-    pool.close()
-    pool.join()
+    executor.shutdown(wait=True)
     
     print("\n" + "="*70)
     print("OPTIMIZACIÓN COMPLETADA")
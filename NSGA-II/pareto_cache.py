@@ -0,0 +1,187 @@
+"""
+Pareto-cache: descarta candidatos claramente dominados antes de lanzar gem5
+
+Mantiene la frontera de Pareto de las simulaciones ya registradas en el CSV
+de resultados y un modelo sustituto (mínimos cuadrados sobre los parámetros
+decodificados) con su error típico. Para un candidato nuevo se calcula la
+cota optimista L = predicción - k·sigma de cada objetivo; si algún punto de
+la frontera es estrictamente mejor que L en los tres objetivos, el candidato
+queda dominado (con confianza ~k sigmas) y no hace falta simularlo. Como
+objetivos se le asigna una penalización (el peor valor visto de cada uno),
+nunca la cota L, que no corresponde a ninguna medida y podría acabar en el
+frente final.
+"""
+import csv
+import io
+import os
+import numpy as np
+
+
+# Columnas usadas como variables del sustituto
+SIZE_PARAMS = ["L1I_size", "L1D_size", "L2_size", "L3_size"]
+NUM_PARAMS = ["L1I_assoc", "L1D_assoc", "L2_assoc", "L3_assoc",
+              "load_queue", "store_queue", "num_fu_read", "num_fu_write"]
+
+_SIZE_UNITS = {"kB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "B": 1}
+
+
+def _size_to_bytes(size):
+    """Convierte '64kB' / '1MB' a bytes"""
+    size = str(size)
+    for unit, factor in _SIZE_UNITS.items():
+        if size.endswith(unit):
+            return int(size[:-len(unit)]) * factor
+    return int(size)
+
+
+def config_features(config):
+    """Vector de variables [1, log2(tamaños)..., valores numéricos...]"""
+    feats = [1.0]
+    feats.extend(np.log2(_size_to_bytes(config[p])) for p in SIZE_PARAMS)
+    feats.extend(float(config.get(p, 2)) for p in NUM_PARAMS)
+    return np.array(feats, dtype=np.float64)
+
+
+class ParetoCache:
+    def __init__(self, results_log_file, k_sigma=3.0, min_samples=30):
+        """
+        Args:
+            results_log_file: CSV de resultados que escribe Gem5Simulator
+            k_sigma: margen de la cota optimista (en desviaciones típicas)
+            min_samples: simulaciones válidas mínimas antes de podar
+        """
+        self.results_log_file = results_log_file
+        self.k_sigma = k_sigma
+        self.min_samples = min_samples
+
+        self._offset = 0      # bytes ya leídos del CSV
+        self._header = None
+        self._X = []          # variables de cada simulación válida
+        self._F = []          # objetivos (-ipc, energy, edp)
+        self._coef = None
+        self._sigma = None
+        self._fitted_n = 0
+        # Frontera ordenada por el primer objetivo (-ipc) + punto ideal
+        self.frontier = np.empty((0, 3), dtype=np.float64)
+        self._ideal = np.full(3, np.inf)
+        self._worst = np.full(3, -np.inf)
+
+    # ===== LECTURA INCREMENTAL DEL CSV =====
+    def refresh(self):
+        """Incorpora las filas nuevas del CSV desde la última lectura"""
+        if not self.results_log_file or not os.path.exists(self.results_log_file):
+            return
+
+        with open(self.results_log_file, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read()
+
+        # Solo líneas completas: otro worker puede estar escribiendo la última
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return
+        self._offset += end + 1
+
+        rows = csv.reader(io.StringIO(chunk[:end + 1].decode()))
+        if self._header is None:
+            self._header = next(rows, None)
+        for values in rows:
+            if len(values) != len(self._header):
+                continue
+            row = dict(zip(self._header, values))
+            try:
+                ipc = float(row["ipc"])
+                energy = float(row["energy"])
+                edp = float(row["edp"])
+                feats = config_features(row)
+            except (KeyError, ValueError):
+                continue
+            # energy = 0: McPAT falló, no es un punto real de la frontera
+            if ipc <= 0 or not 0 < energy < np.inf:
+                continue
+            F = np.array([-ipc, energy, edp])
+            self._X.append(feats)
+            self._F.append(F)
+            self._worst = np.maximum(self._worst, F)
+            self._add_to_frontier(F)
+
+    def _add_to_frontier(self, F):
+        """
+        Inserta F en la frontera si no está dominado y quita los que domina.
+        Al estar ordenada por el objetivo 0, los posibles dominadores de F
+        son un prefijo y los puntos que F puede dominar un sufijo.
+        """
+        front = self.frontier
+        col0 = front[:, 0]
+
+        head = front[:np.searchsorted(col0, F[0], side='right')]
+        if ((head <= F).all(axis=1) & (head < F).any(axis=1)).any():
+            return
+
+        start = np.searchsorted(col0, F[0], side='left')
+        tail = front[start:]
+        keep = ~((F <= tail).all(axis=1) & (F < tail).any(axis=1))
+        front = np.vstack([front[:start], tail[keep]])
+
+        pos = np.searchsorted(front[:, 0], F[0], side='right')
+        self.frontier = np.insert(front, pos, F, axis=0)
+        self._ideal = np.minimum(self._ideal, F)
+
+    # ===== MODELO SUSTITUTO =====
+    def _fit(self):
+        """Ajusta mínimos cuadrados por objetivo si hay datos nuevos"""
+        n = len(self._X)
+        if n == self._fitted_n:
+            return
+        X = np.vstack(self._X)
+        F = np.vstack(self._F)
+        self._coef, _, rank, _ = np.linalg.lstsq(X, F, rcond=None)
+        residuals = F - X @ self._coef
+        self._sigma = residuals.std(axis=0, ddof=min(rank, n - 1))
+        self._fitted_n = n
+
+    def lower_bound(self, config):
+        """Cota optimista (-ipc, energy, edp) del candidato"""
+        pred = config_features(config) @ self._coef
+        return pred - self.k_sigma * self._sigma
+
+    def penalty(self):
+        """
+        Objetivos para un candidato podado: el peor valor visto de cada
+        objetivo, dominado por cualquier punto de la frontera
+        """
+        return self._worst.copy()
+
+    # ===== CONSULTA =====
+    def dominated_bound(self, config):
+        """
+        Devuelve la cota optimista si el candidato está dominado por la
+        frontera actual, o None si hay que simularlo.
+        """
+        self.refresh()
+        if len(self._X) < self.min_samples:
+            return None
+        self._fit()
+
+        L = self.lower_bound(config)
+        # Si la cota mejora al punto ideal en algún objetivo, nadie la domina
+        if (L <= self._ideal).any():
+            return None
+        # Solo el prefijo con objetivo 0 < L[0] puede dominar estrictamente
+        head = self.frontier[:np.searchsorted(self.frontier[:, 0], L[0], side='left')]
+        if (head[:, 1:] < L[1:]).all(axis=1).any():
+            return L
+        return None
+
+
+# Una instancia por proceso worker (el problema se serializa en cada tarea,
+# así que el estado no puede vivir en él)
+_caches = {}
+
+
+def get_pareto_cache(results_log_file, k_sigma=3.0, min_samples=30):
+    """Devuelve el ParetoCache de este proceso para results_log_file"""
+    key = (results_log_file, k_sigma, min_samples)
+    if key not in _caches:
+        _caches[key] = ParetoCache(results_log_file, k_sigma, min_samples)
+    return _caches[key]
@@ -7,9 +7,202 @@ import tempfile
 import os
 import re
 import json
+import csv
+import io
+import fcntl
+import mmap
 from pathlib import Path
 from multiprocessing import Pool
 import time
+import shutil
+import datetime
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+# Columnas del CSV de resultados
+PARAM_COLUMNS = [
+    "L1I_size", "L1I_assoc",
+    "L1D_size", "L1D_assoc",
+    "L2_size", "L2_assoc",
+    "L3_size", "L3_assoc",
+    "load_queue", "store_queue",
+    "num_fu_read", "num_fu_write",
+]
+METRIC_COLUMNS = [
+    "ipc", "cpi", "energy", "edp",
+    "runtime_power", "leakage_power", "total_power",
+    "sim_seconds", "sim_ticks",
+]
+
+
+# Campos de los que depende la potencia de McPAT (cachés y colas). Junto con
+# sim_seconds y cpi redondeados identifican el resultado de McPAT: en los
+# datos registrados, filas con la misma clave tienen la misma potencia.
+MCPAT_KEY_PARAMS = PARAM_COLUMNS[:10]
+
+
+def _mcpat_key(param_values, sim_seconds, cpi):
+    """Clave de la caché de McPAT (param_values en el orden de PARAM_COLUMNS)"""
+    return (*param_values[:len(MCPAT_KEY_PARAMS)], round(sim_seconds, 4), round(cpi, 3))
+
+
+def _config_values(config):
+    """Parámetros de diseño como texto, en el orden de las columnas del CSV"""
+    return [str(config.get(p, 2)) if p.startswith("num_fu_") else str(config[p])
+            for p in PARAM_COLUMNS]
+
+
+class _ResultCache:
+    """
+    Resultados válidos ya simulados, indexados por configuración, y
+    potencias de McPAT indexadas por _mcpat_key.
+
+    El CSV de resultados hace de almacén persistente compartido: cada worker
+    lee incrementalmente las filas nuevas (las escriben todos los workers y
+    ejecuciones anteriores), así que no hace falta otra base de datos.
+    """
+    def __init__(self, results_log_file):
+        self.results_log_file = results_log_file
+        self._offset = 0
+        self._header = None
+        self._results = {}
+        self._power = {}
+    
+    def refresh(self):
+        """Incorpora las filas nuevas del CSV desde la última lectura"""
+        if not os.path.exists(self.results_log_file):
+            return
+        
+        with open(self.results_log_file, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        
+        # Solo líneas completas: otro worker puede estar escribiendo la última
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return
+        self._offset += end + 1
+        
+        rows = csv.reader(io.StringIO(chunk[:end + 1].decode()))
+        if self._header is None:
+            self._header = next(rows, None)
+        for values in rows:
+            if len(values) != len(self._header):
+                continue
+            row = dict(zip(self._header, values))
+            try:
+                metrics = {c: int(row[c]) if c == "sim_ticks" else float(row[c])
+                           for c in METRIC_COLUMNS}
+                key = tuple(row[p] for p in PARAM_COLUMNS)
+            except (KeyError, ValueError):
+                continue
+            # Con McPAT fallido la fila tiene potencia 0 (energy = EDP = 0):
+            # no es un resultado válido y la configuración se vuelve a simular
+            power = metrics["runtime_power"] + metrics["leakage_power"]
+            if metrics["ipc"] > 0 and power > 0 and 0 < metrics["energy"] < np.inf:
+                self._results[key] = metrics
+                if metrics["runtime_power"] > 0:
+                    mkey = _mcpat_key(key, metrics["sim_seconds"], metrics["cpi"])
+                    self._power[mkey] = {"runtime_dynamic": metrics["runtime_power"],
+                                         "total_leakage": metrics["leakage_power"]}
+    
+    def get(self, config):
+        """Métricas cacheadas para config o None"""
+        self.refresh()
+        return self._results.get(tuple(_config_values(config)))
+    
+    def get_power(self, config, gem5_metrics):
+        """Salida de McPAT cacheada para config + métricas de gem5, o None"""
+        if gem5_metrics["sim_seconds"] is None or gem5_metrics["cpi"] is None:
+            return None
+        self.refresh()
+        mkey = _mcpat_key(_config_values(config), gem5_metrics["sim_seconds"], gem5_metrics["cpi"])
+        power = self._power.get(mkey)
+        return dict(power) if power is not None else None
+
+
+# Una caché por proceso y CSV
+_result_caches = {}
+
+
+def _get_result_cache(results_log_file):
+    if results_log_file not in _result_caches:
+        _result_caches[results_log_file] = _ResultCache(results_log_file)
+    return _result_caches[results_log_file]
+
+
+# Un descriptor de append por proceso y CSV (se abre una vez, no por fila)
+_csv_handles = {}
+
+
+def _get_csv_handle(results_log_file):
+    fh = _csv_handles.get(results_log_file)
+    if fh is None or fh.closed:
+        fh = open(results_log_file, 'a', buffering=64 * 1024)
+        _csv_handles[results_log_file] = fh
+    return fh
+
+
+# Patrón de la salida de McPAT (compilado una sola vez): una alternación
+# para recorrer el fichero en una sola pasada
+_RE_MCPAT = re.compile(rb'(Runtime Dynamic|Total Leakage)\s*=\s*(\d+(?:\.\d*)?)\s*W')
+_MCPAT_KEYS = {b"Runtime Dynamic": "runtime_dynamic", b"Total Leakage": "total_leakage"}
+
+# Hilo de fondo (uno por proceso) que archiva y limpia /dev/shm mientras
+# el worker ya lanza el siguiente gem5. Al terminar el worker, threading
+# espera a que se vacíe la cola, así que no se pierde ningún archivado ni
+# queda basura en /dev/shm (por eso no es un hilo daemon).
+_background = None
+
+
+def _get_background():
+    global _background
+    if _background is None:
+        _background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sim-bg")
+    return _background
+
+
+def _discard_dir(path):
+    """Renombra path a un nombre de papelera y lo borra en segundo plano"""
+    path = str(path)
+    trash = os.path.join(os.path.dirname(path),
+                         f".trash_{os.path.basename(path)}_{os.getpid()}_{time.monotonic_ns()}")
+    try:
+        os.rename(path, trash)
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    _get_background().submit(shutil.rmtree, trash, True)
+
+
+def _read_head(path, n):
+    """Primeros n caracteres de un fichero de log (vacío si no existe)"""
+    try:
+        with open(path, 'r', errors='replace') as f:
+            return f.read(n)
+    except OSError:
+        return ""
+
+
+def _wait_for_file(path, timeout=5.0, poll=0.01):
+    """Espera a que path exista y no esté vacío; devuelve si lo consiguió"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if path.stat().st_size > 0:
+                return True
+        except FileNotFoundError:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll)
+
+
+def objectives(metrics):
+    """Objetivos a minimizar (-IPC, Energy, EDP) como array float64"""
+    return np.array([-metrics['ipc'], metrics['energy'], metrics['edp']], dtype=np.float64)
 
 
 class Gem5Simulator:
@@ -24,6 +217,10 @@ class Gem5Simulator:
         self.results_log_file = results_log_file
         self.archive_dir = Path(archive_dir) if archive_dir else None
         
+        # Entorno de los subprocesos: un solo hilo en las librerías numéricas
+        # de gem5/McPAT para no sobresuscribir el núcleo fijado al worker
+        self._env = dict(os.environ, OMP_NUM_THREADS="1", MKL_NUM_THREADS="1")
+        
         self.gem5_binary = self.workspace_dir / "gem5/build/ARM/gem5.fast"
         self.config_script = self.workspace_dir / "gem5/scripts/CortexA76_scripts_gem5/CortexA76.py"
         self.workload_binary = self.workspace_dir / "gem5/workloads/mp3_enc/mp3_enc"
@@ -50,24 +247,23 @@ class Gem5Simulator:
         # Crear header del CSV si el archivo no existe
         if self.results_log_file and not Path(self.results_log_file).exists():
             self._create_csv_header()
+        
+        # Resultados ya simulados (leídos del propio CSV)
+        self._cache = _get_result_cache(self.results_log_file) if self.results_log_file else None
+    
+    def cached_result(self, config):
+        """Resultado de una simulación previa con la misma configuración, o None"""
+        if self._cache is None:
+            return None
+        metrics = self._cache.get(config)
+        if metrics is None:
+            return None
+        return self._result(config, dict(metrics))
     
     def _create_csv_header(self):
         """Crea el header del CSV con todos los parámetros y métricas"""
-        header = [
-            "sim_id",
-            "timestamp",
-            # Parámetros de diseño (12 columnas)
-            "L1I_size", "L1I_assoc",
-            "L1D_size", "L1D_assoc",
-            "L2_size", "L2_assoc",
-            "L3_size", "L3_assoc",
-            "load_queue", "store_queue",
-            "num_fu_read", "num_fu_write",
-            # Métricas (9 columnas)
-            "ipc", "cpi", "energy", "edp",
-            "runtime_power", "leakage_power", "total_power",
-            "sim_seconds", "sim_ticks"
-        ]
+        # sim_id, timestamp + parámetros de diseño (12) + métricas (9)
+        header = ["sim_id", "timestamp"] + PARAM_COLUMNS + METRIC_COLUMNS
         
         with open(self.results_log_file, 'w') as f:
             f.write(",".join(header) + "\n")
@@ -81,63 +277,80 @@ class Gem5Simulator:
             sim_id: identificador único de la simulación
         
         Returns:
-            dict: {"config": config, "metrics": {...}}
+            dict: {"config": config, "metrics": {...}, "F": array(-ipc, energy, edp)}
         """
+        # Configuración ya simulada: reutilizar (no se vuelve a registrar en el CSV)
+        cached = self.cached_result(config)
+        if cached is not None:
+            print(f"[Sim {sim_id}] Configuración ya simulada, se reutiliza el resultado")
+            return cached
+        
         tmpdir = f"/dev/shm/sim_{sim_id:04d}"
         os.makedirs(tmpdir, exist_ok=True)
+        archived_async = False
         
         try:
             # ===== PASO 1: Ejecutar gem5 =====
             cmd = self._build_gem5_command(config, tmpdir)
             
+            # La salida de gem5 va a ficheros del tmpdir (no se retiene en
+            # memoria); solo se lee el principio si falla
+            gem5_out = Path(tmpdir) / "gem5.out"
+            gem5_err = Path(tmpdir) / "gem5.err"
             print(f"[Sim {sim_id}] Ejecutando gem5...")
-            result = subprocess.run(
-                cmd,
-                cwd=str(self.workspace_dir / "gem5"),
-                capture_output=True,
-                text=True,
-                timeout=1800
-            )
+            with open(gem5_out, 'wb') as out, open(gem5_err, 'wb') as err:
+                result = subprocess.run(
+                    cmd,
+                    cwd=str(self.workspace_dir / "gem5"),
+                    stdout=out,
+                    stderr=err,
+                    env=self._env,
+                    timeout=1800
+                )
             
             if result.returncode != 0:
                 print(f"[Sim {sim_id}] gem5 falló (code {result.returncode})")
-                print(f"    STDERR: {result.stderr[:500]}")
-                if result.stdout:
-                    print(f"    STDOUT: {result.stdout[:300]}")
+                print(f"    STDERR: {_read_head(gem5_err, 500)}")
+                stdout_head = _read_head(gem5_out, 300)
+                if stdout_head:
+                    print(f"    STDOUT: {stdout_head}")
                 metrics = self._get_invalid_metrics()
                 self._log_result(sim_id, config, metrics)
-                return {"config": config, "metrics": metrics}
-            
-            # Esperar 1 segundo a que gem5 termine de escribir archivos
-            time.sleep(1.0)
+                return self._result(config, metrics)
             
-            # Verificar archivos
+            # Verificar archivos (subprocess.run ya esperó a gem5; en tmpfs los
+            # ficheros son visibles al salir, solo se sondea por si acaso)
             stats_file = Path(tmpdir) / "stats.txt"
             config_json = Path(tmpdir) / "config.json"
+            _wait_for_file(stats_file)
             
             if not stats_file.exists():
                 print(f"[Sim {sim_id}] stats.txt no encontrado")
                 metrics = self._get_invalid_metrics()
                 self._log_result(sim_id, config, metrics)
-                return {"config": config, "metrics": metrics}
+                return self._result(config, metrics)
             
             if not config_json.exists():
                 print(f"[Sim {sim_id}] config.json no generado")
                 metrics = self._get_invalid_metrics()
                 self._log_result(sim_id, config, metrics)
-                return {"config": config, "metrics": metrics}
+                return self._result(config, metrics)
             
             if config_json.stat().st_size == 0:
                 print(f"[Sim {sim_id}] config.json vacío")
                 metrics = self._get_invalid_metrics()
                 self._log_result(sim_id, config, metrics)
-                return {"config": config, "metrics": metrics}
+                return self._result(config, metrics)
             
             # Parsear gem5
             gem5_metrics = self._parse_gem5_stats(stats_file)
             
-            # ===== PASO 2: Ejecutar McPAT =====
-            mcpat_metrics = self._run_mcpat(tmpdir, stats_file, config_json)
+            # ===== PASO 2: Ejecutar McPAT (salvo que ya se conozca su salida) =====
+            mcpat_metrics = self._cache.get_power(config, gem5_metrics) if self._cache else None
+            if mcpat_metrics is not None:
+                print(f"[Sim {sim_id}] Potencia de McPAT reutilizada")
+            else:
+                mcpat_metrics = self._run_mcpat(tmpdir, stats_file, config_json, sim_id)
             
             # ===== PASO 3: Calcular métricas =====
             metrics = self._calculate_final_metrics(gem5_metrics, mcpat_metrics)
@@ -145,9 +358,15 @@ class Gem5Simulator:
             # ===== PASO 4: Guardar resultado =====
             self._log_result(sim_id, config, metrics)
             
-            # ===== PASO 5: Archivar si se especificó =====
+            # ===== PASO 5: Archivar si se especificó (en segundo plano) =====
+            # El resumen se serializa aquí (instantánea de config/metrics); la
+            # creación del directorio, las copias y el borrado del tmpdir van
+            # encadenados en la misma tarea de fondo
             if self.archive_dir:
-                self._archive_simulation(sim_id, tmpdir, config, metrics)
+                summary_json = json.dumps({"sim_id": sim_id, "config": config, "metrics": metrics},
+                                          indent=2)
+                _get_background().submit(self._archive_and_cleanup, sim_id, tmpdir, summary_json)
+                archived_async = True
             
             # Mostrar resultado
             if metrics['energy'] > 0 and metrics['energy'] != float('inf'):
@@ -155,27 +374,30 @@ class Gem5Simulator:
             else:
                 print(f"[Sim {sim_id}] McPAT falló - IPC={metrics['ipc']:.4f}")
             
-            return {"config": config, "metrics": metrics}
+            return self._result(config, metrics)
         
         except subprocess.TimeoutExpired:
             print(f"[Sim {sim_id}] TIMEOUT")
             metrics = self._get_invalid_metrics()
             self._log_result(sim_id, config, metrics)
-            return {"config": config, "metrics": metrics}
+            return self._result(config, metrics)
         
         except Exception as e:
             print(f"[Sim {sim_id}] ERROR: {e}")
-            import traceback
             traceback.print_exc()
             metrics = self._get_invalid_metrics()
             self._log_result(sim_id, config, metrics)
-            return {"config": config, "metrics": metrics}
+            return self._result(config, metrics)
         
         finally:
-            # Limpiar directorio temporal
-            if os.path.exists(tmpdir):
-                import shutil
-                shutil.rmtree(tmpdir)
+            # Limpiar directorio temporal fuera del camino crítico (si se
+            # archiva, ya lo borra la tarea de archivado)
+            if not archived_async and os.path.exists(tmpdir):
+                _discard_dir(tmpdir)
+    
+    def _result(self, config, metrics):
+        """Empaqueta el resultado con los objetivos ya listos para pymoo"""
+        return {"config": config, "metrics": metrics, "F": objectives(metrics)}
     
     def _build_gem5_command(self, config, outdir):
         """Construye el comando gem5 con los parámetros"""
@@ -214,32 +436,35 @@ class Gem5Simulator:
             "sim_ticks": None,
         }
         
-        with open(stats_file, 'r') as f:
-            content = f.read()
-        
-        # Buscar CPI
-        match = re.search(r'system\.cpu\.cpi\s+(\d+\.\d+)', content)
-        if match:
-            metrics["cpi"] = float(match.group(1))
+        # Recorrido línea a línea sobre un mmap (sin copiar el fichero a un
+        # str): las tres claves están al principio del volcado, así que se
+        # sale en cuanto aparecen todas
+        wanted = {b"system.cpu.cpi": "cpi", b"simSeconds": "sim_seconds", b"simTicks": "sim_ticks"}
+        with open(stats_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for line in iter(mm.readline, b""):
+                        parts = line.split(None, 2)
+                        if len(parts) < 2 or parts[0] not in wanted:
+                            continue
+                        name = wanted.pop(parts[0])
+                        try:
+                            metrics[name] = int(parts[1]) if name == "sim_ticks" else float(parts[1])
+                        except ValueError:
+                            pass
+                        if not wanted:
+                            break
+        
+        if metrics["cpi"] is not None:
             metrics["ipc"] = 1.0 / metrics["cpi"] if metrics["cpi"] > 0 else 0.0
         
-        # Buscar sim_seconds
-        match = re.search(r'simSeconds\s+(\d+\.\d+)', content)
-        if match:
-            metrics["sim_seconds"] = float(match.group(1))
-        
-        # Buscar sim_ticks
-        match = re.search(r'simTicks\s+(\d+)', content)
-        if match:
-            metrics["sim_ticks"] = int(match.group(1))
-        
         if metrics["cpi"] is None:
             metrics["cpi"] = float('inf')
             metrics["ipc"] = 0.0
         
         return metrics
     
-    def _run_mcpat(self, tmpdir, stats_file, config_json):
+    def _run_mcpat(self, tmpdir, stats_file, config_json, sim_id):
         """Ejecuta McPAT y parsea salida"""
         mcpat_config_xml = Path(tmpdir) / "config.xml"
         mcpat_output = Path(tmpdir) / "salida_mcpat.txt"
@@ -251,23 +476,20 @@ class Gem5Simulator:
                 str(stats_file),
                 str(config_json),
                 str(self.mcpat_template)
-            ], cwd=tmpdir, capture_output=True, text=True, timeout=60)
+            ], cwd=tmpdir, env=self._env, capture_output=True, text=True, timeout=60)
             
             if result_gen.returncode != 0:
-                sim_id = tmpdir.split('_')[-1]
                 print(f"    [Sim {sim_id}] gem5toMcPAT falló:")
                 print(f"        STDERR: {result_gen.stderr[:300]}")
                 return {"runtime_dynamic": 0.0, "total_leakage": 0.0}
             
-            time.sleep(1.0)
+            _wait_for_file(mcpat_config_xml)
             
             if not mcpat_config_xml.exists():
-                sim_id = tmpdir.split('_')[-1]
                 print(f"    [Sim {sim_id}] config.xml no generado")
                 return {"runtime_dynamic": 0.0, "total_leakage": 0.0}
             
             if mcpat_config_xml.stat().st_size == 0:
-                sim_id = tmpdir.split('_')[-1]
                 print(f"    [Sim {sim_id}] config.xml vacío")
                 return {"runtime_dynamic": 0.0, "total_leakage": 0.0}
             
@@ -277,10 +499,9 @@ class Gem5Simulator:
                     str(self.mcpat_bin),
                     "-infile", str(mcpat_config_xml),
                     "-print_level", "1"
-                ], cwd=tmpdir, stdout=mf, stderr=subprocess.PIPE, text=True, timeout=300)  # ← CAMBIAR de 60 a 300
+                ], cwd=tmpdir, env=self._env, stdout=mf, stderr=subprocess.PIPE, text=True, timeout=300)  # ← CAMBIAR de 60 a 300
             
             if result_mcpat.returncode != 0:
-                sim_id = tmpdir.split('_')[-1]
                 print(f"    [Sim {sim_id}] McPAT falló:")
                 print(f"        STDERR: {result_mcpat.stderr[:300]}")
                 return {"runtime_dynamic": 0.0, "total_leakage": 0.0}
@@ -288,7 +509,6 @@ class Gem5Simulator:
             metrics = self._parse_mcpat_output(mcpat_output)
             
             if metrics["runtime_dynamic"] == 0.0 and metrics["total_leakage"] == 0.0:
-                sim_id = tmpdir.split('_')[-1]
                 print(f"    [Sim {sim_id}] McPAT no retornó potencias. Primeras líneas:")
                 with open(mcpat_output, 'r') as f:
                     print(f"        {f.read(400)}")
@@ -297,12 +517,10 @@ class Gem5Simulator:
         
         except subprocess.TimeoutExpired:
             # ← MEJORAR: Mensaje más informativo
-            sim_id = tmpdir.split('_')[-1]
             print(f"    [Sim {sim_id}] McPAT TIMEOUT (>300s) - probablemente bucle infinito")
             return {"runtime_dynamic": 0.0, "total_leakage": 0.0}
         
         except Exception as e:
-            sim_id = tmpdir.split('_')[-1]
             print(f"    [Sim {sim_id}] McPAT exception: {e}")
             return {"runtime_dynamic": 0.0, "total_leakage": 0.0}
 
@@ -313,16 +531,21 @@ class Gem5Simulator:
             "total_leakage": 0.0
         }
         
-        with open(mcpat_output, 'r') as f:
-            content = f.read()
-        
-        match = re.search(r'Runtime Dynamic\s*=\s*(\d+\.?\d*)\s*W', content)
-        if match:
-            metrics["runtime_dynamic"] = float(match.group(1))
-        
-        match = re.search(r'Total Leakage\s*=\s*(\d+\.?\d*)\s*W', content)
-        if match:
-            metrics["total_leakage"] = float(match.group(1))
+        # La regex (bytes) recorre directamente el mmap del fichero. Cuenta
+        # la primera aparición de cada campo (la del procesador completo) y
+        # se corta en cuanto están los dos.
+        found = set()
+        with open(mcpat_output, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return metrics
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for match in _RE_MCPAT.finditer(mm):
+                    key = _MCPAT_KEYS[match.group(1)]
+                    if key not in found:
+                        found.add(key)
+                        metrics[key] = float(match.group(2))
+                        if len(found) == len(_MCPAT_KEYS):
+                            break
         
         return metrics
     
@@ -373,34 +596,42 @@ class Gem5Simulator:
         if not self.results_log_file:
             return
         
-        import datetime
-        
         row = [
             str(sim_id),
             datetime.datetime.now().isoformat(),
             # Parámetros de diseño
-            config["L1I_size"], str(config["L1I_assoc"]),
-            config["L1D_size"], str(config["L1D_assoc"]),
-            config["L2_size"], str(config["L2_assoc"]),
-            config["L3_size"], str(config["L3_assoc"]),
-            str(config["load_queue"]), str(config["store_queue"]),
-            str(config.get("num_fu_read", 2)), str(config.get("num_fu_write", 2)),
-            # Métricas
-            f"{metrics['ipc']:.6f}", f"{metrics['cpi']:.6f}",
-            f"{metrics['energy']:.6f}", f"{metrics['edp']:.10f}",
+            *_config_values(config),
+            # Métricas: los objetivos con precisión completa (repr), así la
+            # caché de resultados devuelve exactamente el mismo F que la
+            # simulación original
+            repr(float(metrics['ipc'])), f"{metrics['cpi']:.6f}",
+            repr(float(metrics['energy'])), repr(float(metrics['edp'])),
             f"{metrics['runtime_power']:.6f}", f"{metrics['leakage_power']:.6f}",
             f"{metrics['total_power']:.6f}",
             f"{metrics['sim_seconds']:.6f}", str(metrics['sim_ticks'])
         ]
         
-        with open(self.results_log_file, 'a') as f:
-            f.write(",".join(row) + "\n")
+        # flock + flush por fila: los workers no intercalan líneas y el CSV
+        # queda al día para las cachés que lo leen (y ante un corte)
+        fh = _get_csv_handle(self.results_log_file)
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            fh.write(",".join(row) + "\n")
+            fh.flush()
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
     
-    def _archive_simulation(self, sim_id, tmpdir, config, metrics):
-        """Archiva archivos de simulación"""
-        import shutil
-        import json
-        
+    def _archive_and_cleanup(self, sim_id, tmpdir, summary_json):
+        """Tarea de fondo: archiva la simulación y después borra su directorio temporal"""
+        try:
+            self._archive_simulation(sim_id, tmpdir, summary_json)
+        except Exception as e:
+            print(f"[Sim {sim_id}] Error archivando: {e}")
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    
+    def _archive_simulation(self, sim_id, tmpdir, summary_json):
+        """Archiva archivos de simulación (summary_json ya serializado)"""
         archive_sim_dir = self.archive_dir / f"sim_{sim_id:04d}"
         archive_sim_dir.mkdir(parents=True, exist_ok=True)
         
@@ -411,20 +642,41 @@ class Gem5Simulator:
             if src.exists():
                 shutil.copy2(src, archive_sim_dir / filename)
         
-        summary = {"sim_id": sim_id, "config": config, "metrics": metrics}
         with open(archive_sim_dir / "summary.json", 'w') as f:
-            json.dump(summary, f, indent=2)
+            f.write(summary_json)
+
+
+# ===== SIMULADOR PERSISTENTE POR WORKER =====
+# Se construye una vez por proceso (initializer del Pool) en lugar de en cada
+# tarea: las comprobaciones de rutas y el estado (cachés, CSV) se reutilizan.
+_worker_sim = None
+
+
+def init_worker(workspace_dir, results_log_file=None, archive_dir=None):
+    """Initializer del Pool: crea el Gem5Simulator de este worker"""
+    global _worker_sim
+    _worker_sim = Gem5Simulator(workspace_dir, results_log_file, archive_dir)
+
+
+def get_worker_simulator(workspace_dir, results_log_file=None, archive_dir=None):
+    """Devuelve el simulador del worker (lo crea si no pasó por init_worker)"""
+    if _worker_sim is None:
+        init_worker(workspace_dir, results_log_file, archive_dir)
+    return _worker_sim
 
 
 # ===== FUNCIÓN WRAPPER PARA PARALELIZACIÓN =====
 def run_single_simulation(args):
-    """Wrapper para multiprocessing"""
-    workspace_dir, config, sim_id, name, results_log_file, archive_dir = args
+    """
+    Wrapper para multiprocessing: args = (config, sim_id, name).
+    Requiere Pool(..., initializer=init_worker, initargs=(workspace_dir, results_log_file, archive_dir)).
+    """
+    config, sim_id, name = args
     
-    sim = Gem5Simulator(workspace_dir, results_log_file, archive_dir)
+    assert _worker_sim is not None, "run_single_simulation requiere initializer=init_worker"
     
     start = time.time()
-    result = sim.run_simulation(config, sim_id)
+    result = _worker_sim.run_simulation(config, sim_id)
     elapsed = time.time() - start
     
-    return (name, result, elapsed)
\ No newline at end of file
+    return (name, result, elapsed)
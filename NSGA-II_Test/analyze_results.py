@@ -3,42 +3,87 @@ Analiza resultados del NSGA-II y encuentra mejores configuraciones
 """
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.patches import Patch
 import numpy as np
 
-# Cargar resultados
-df = pd.read_csv("nsga2_results.csv")
+# Cargar resultados: solo las columnas que usa el análisis, con tipos fijos
+# (sin inferencia). Los objetivos se quedan en float64 para que los valores
+# impresos no cambien.
+COLUMNS = ['sim_id', 'L1D_size', 'L2_size', 'load_queue', 'ipc', 'energy', 'edp']
+RESULTS_FILE = "nsga2_results.csv"
+
+# Las filas surrogate=True son predicciones del sustituto, no simulaciones:
+# se descartan antes de cualquier estadística (CSVs antiguos no tienen la columna)
+with open(RESULTS_FILE) as f:
+    has_surrogate = 'surrogate' in f.readline().rstrip("\n").split(",")
+usecols = COLUMNS + ['surrogate'] if has_surrogate else COLUMNS
+
+df = pd.read_csv(RESULTS_FILE, usecols=usecols, engine='c',
+                 dtype={'sim_id': np.int32, 'L1D_size': str, 'L2_size': str,
+                        'load_queue': np.int16, 'ipc': np.float64,
+                        'energy': np.float64, 'edp': np.float64,
+                        'surrogate': str})
+n_predicted = 0
+if has_surrogate:
+    predicted = df['surrogate'] == 'True'
+    n_predicted = int(predicted.sum())
+    df = df[~predicted]
+df = df[COLUMNS].reset_index(drop=True)
 df_valid = df[df['ipc'] > 0].copy()
 
+# Columnas de objetivos como arrays (una sola conversión)
+ipc_arr = df_valid['ipc'].to_numpy()
+energy_arr = df_valid['energy'].to_numpy()
+edp_arr = df_valid['edp'].to_numpy()
+
+
+def top_k(values, k, largest=False):
+    """
+    Posiciones de los k mejores valores, ordenadas como nlargest/nsmallest
+    (empates: primero el que aparece antes). argpartition es O(N) y solo
+    se ordenan los candidatos que empatan o superan al k-ésimo.
+    """
+    key = -values if largest else values
+    k = min(k, len(key))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    kth = key[np.argpartition(key, k - 1)[k - 1]]
+    cand = np.flatnonzero(key <= kth)
+    return cand[np.argsort(key[cand], kind='stable')][:k]
+
+
 print("="*70)
 print("ANÁLISIS DE RESULTADOS NSGA-II")
 print("="*70)
 print(f"Total simulaciones: {len(df)}")
 print(f"Simulaciones válidas: {len(df_valid)}")
 print(f"Simulaciones fallidas: {(df['ipc'] == 0).sum()}")
+if n_predicted:
+    print(f"Predicciones del sustituto (excluidas): {n_predicted}")
 
 # Top 3 por métrica
 print("\n" + "="*70)
 print("🏆 TOP 3 - MAYOR IPC (más rápido)")
 print("="*70)
-top_ipc = df_valid.nlargest(3, 'ipc')
-print(top_ipc[['sim_id', 'L1D_size', 'L2_size', 'load_queue', 'ipc', 'energy', 'edp']])
+top_ipc = df_valid.iloc[top_k(ipc_arr, 3, largest=True)]
+print(top_ipc[COLUMNS])
 
 print("\n" + "="*70)
 print("⚡ TOP 3 - MENOR ENERGY (más eficiente)")
 print("="*70)
-top_energy = df_valid.nsmallest(3, 'energy')
-print(top_energy[['sim_id', 'L1D_size', 'L2_size', 'load_queue', 'ipc', 'energy', 'edp']])
+top_energy = df_valid.iloc[top_k(energy_arr, 3)]
+print(top_energy[COLUMNS])
 
 print("\n" + "="*70)
 print("⚖️  TOP 3 - MENOR EDP (mejor balance)")
 print("="*70)
-top_edp = df_valid.nsmallest(3, 'edp')
-print(top_edp[['sim_id', 'L1D_size', 'L2_size', 'load_queue', 'ipc', 'energy', 'edp']])
+top_edp = df_valid.iloc[top_k(edp_arr, 3)]
+print(top_edp[COLUMNS])
 
 # Mejores individuos
-best_ipc = df_valid.loc[df_valid['ipc'].idxmax()]
-best_energy = df_valid.loc[df_valid['energy'].idxmin()]
-best_edp = df_valid.loc[df_valid['edp'].idxmin()]
+best_ipc = df_valid.iloc[np.argmax(ipc_arr)]
+best_energy = df_valid.iloc[np.argmin(energy_arr)]
+best_edp = df_valid.iloc[np.argmin(edp_arr)]
 
 print("\n" + "="*70)
 print("MEJORES CONFIGURACIONES")
@@ -52,6 +97,20 @@ print(f"   L1D={best_energy['L1D_size']}, L2={best_energy['L2_size']}, LQ={best_
 print(f"\n⚖️  MEJOR EDP = {best_edp['edp']:.6f}")
 print(f"   L1D={best_edp['L1D_size']}, L2={best_edp['L2_size']}, LQ={best_edp['load_queue']}")
 
+def scatter_by_group(ax, column, prefix):
+    """
+    Una sola llamada a scatter (un PathCollection) coloreada por grupo,
+    en vez de un scatter por valor único de la columna
+    """
+    codes, uniques = pd.factorize(df_valid[column])
+    cmap = plt.get_cmap('tab10')
+    ax.scatter(energy_arr, ipc_arr, c=codes % cmap.N, cmap=cmap,
+               vmin=0, vmax=cmap.N - 1, s=100, alpha=0.7)
+    handles = [Patch(color=cmap(i % cmap.N), alpha=0.7, label=f'{prefix}={u}')
+               for i, u in enumerate(uniques)]
+    ax.legend(handles=handles, fontsize=10)
+
+
 # ===== GRÁFICOS DE DISPERSIÓN =====
 print("\n" + "="*70)
 print("GENERANDO GRÁFICOS...")
@@ -98,24 +157,18 @@ ax2.grid(True, alpha=0.3)
 
 # 3. Impacto de L2 cache
 ax3 = axes[1, 0]
-for l2_size in df_valid['L2_size'].unique():
-    data = df_valid[df_valid['L2_size'] == l2_size]
-    ax3.scatter(data['energy'], data['ipc'], label=f'L2={l2_size}', s=100, alpha=0.7)
+scatter_by_group(ax3, 'L2_size', 'L2')
 ax3.set_xlabel('Energy (J)', fontsize=12)
 ax3.set_ylabel('IPC', fontsize=12)
 ax3.set_title('Impacto de L2 Cache Size', fontsize=14, fontweight='bold')
-ax3.legend(fontsize=10)
 ax3.grid(True, alpha=0.3)
 
 # 4. Impacto de L1D cache
 ax4 = axes[1, 1]
-for l1d_size in df_valid['L1D_size'].unique():
-    data = df_valid[df_valid['L1D_size'] == l1d_size]
-    ax4.scatter(data['energy'], data['ipc'], label=f'L1D={l1d_size}', s=100, alpha=0.7)
+scatter_by_group(ax4, 'L1D_size', 'L1D')
 ax4.set_xlabel('Energy (J)', fontsize=12)
 ax4.set_ylabel('IPC', fontsize=12)
 ax4.set_title('Impacto de L1D Cache Size', fontsize=14, fontweight='bold')
-ax4.legend(fontsize=10)
 ax4.grid(True, alpha=0.3)
 
 plt.tight_layout()
@@ -1,6 +1,7 @@
 """
 Definición del espacio de diseño y funciones de encoding/decoding
 """
+import numpy as np
 
 # Espacio de diseño COMPLETO (8 parámetros variables)
 DESIGN_SPACE = {
@@ -32,21 +33,29 @@ DESIGN_SPACE = {
 # Espacio total = 2 × 3 × 4 × 3 × 4 × 3 × 1 × 1 × 3 × 3 × 3 × 2 = 31,104 configuraciones únicas
 # Con 1,040 simulaciones: 3.34% de cobertura, <1% duplicados
 
+# Tablas precalculadas para decodificar sin recorrer DESIGN_SPACE cada vez
+_PARAMS = list(DESIGN_SPACE.keys())
+_OPTS = [np.array(values, dtype=object) for values in DESIGN_SPACE.values()]
+_NOPTS = np.array([len(values) for values in _OPTS], dtype=np.int32)
+
+
+def decode_population(X):
+    """
+    Decodifica una población completa (P, n_params) de una vez:
+    recorte de índices con np.clip y selección por indexado
+    """
+    X = np.atleast_2d(np.asarray(X))
+    idx = np.clip(X.astype(np.int32), 0, _NOPTS - 1)
+    columns = [opts[idx[:, j]].tolist() for j, opts in enumerate(_OPTS)]
+    return [dict(zip(_PARAMS, row)) for row in zip(*columns)]
+
+
 def decode_individual(x):
     """Convierte [0,1,2,...] a {"L1D_size": "64kB", ...}"""
-    config = {}
-    param_names = list(DESIGN_SPACE.keys())
-    
-    for i, param in enumerate(param_names):
-        idx = int(x[i])
-        idx = max(0, min(idx, len(DESIGN_SPACE[param]) - 1))
-        config[param] = DESIGN_SPACE[param][idx]
-    
-    return config
+    return decode_population(x)[0]
 
 def get_bounds():
     """Retorna límites (0, n_opciones-1) para cada parámetro"""
-    import numpy as np
     n_params = len(DESIGN_SPACE)
     xl = np.zeros(n_params)
     xu = np.array([len(values) - 1 for values in DESIGN_SPACE.values()])
@@ -11,6 +11,13 @@ RESULTS_LOG = os.path.join(WORKSPACE, "P1_Arq/NSGA-II_Test/nsga2_results.csv")
 N_CORES = 2         # ← AQUÍ defines cuántos núcleos usar
 POP_SIZE = 3       # 40 individuos por generación
 N_GEN = 1           # 25 generaciones
+USE_SURROGATE = False  # Pre-filtro con RandomForest (requiere scikit-learn)
+
+# Fast-forward opcional: checkpoint tras la inicialización de mp3_enc
+# (CortexA76.py debe aceptar las opciones de checkpoint de se.py)
+CHECKPOINT_DIR = None  # p.ej. os.path.join(WORKSPACE, "ckpt")
+CHECKPOINT_INST = 100_000_000
+MAX_INSTS = None       # p.ej. 500_000_000 para acotar cada simulación
 
 
 if __name__ == "__main__":
@@ -26,7 +33,11 @@ if __name__ == "__main__":
         results_log_file=RESULTS_LOG,
         pop_size=POP_SIZE,
         n_gen=N_GEN,
-        n_cores=N_CORES  # ← Pasar núcleos al optimizador
+        n_cores=N_CORES,  # ← Pasar núcleos al optimizador
+        use_surrogate=USE_SURROGATE,
+        checkpoint_dir=CHECKPOINT_DIR,
+        checkpoint_inst=CHECKPOINT_INST,
+        max_insts=MAX_INSTS
     )
     
     print("\n✅ Optimización completada!")
@@ -3,25 +3,41 @@ Optimización multi-objetivo con NSGA-II
 """
 import numpy as np
 from pymoo.algorithms.moo.nsga2 import NSGA2
-from pymoo.core.problem import ElementwiseProblem
+from pymoo.core.problem import Problem
+from pymoo.core.callback import Callback
 from pymoo.optimize import minimize
 from pymoo.operators.sampling.rnd import IntegerRandomSampling
 from pymoo.operators.crossover.sbx import SBX
 from pymoo.operators.mutation.pm import PM
 from multiprocessing.pool import Pool
-from pymoo.core.problem import StarmapParallelization
-from multiprocessing import Manager, Lock
 
-from design_space import DESIGN_SPACE, decode_individual, get_bounds
-from simulator import Gem5Simulator
+from design_space import DESIGN_SPACE, decode_individual, decode_population, get_bounds
+from simulator import Gem5Simulator, init_worker, run_single_simulation
+from surrogate import Surrogate
 
 
-class CacheOptimizationProblem(ElementwiseProblem):
-    def __init__(self, workspace_dir, results_log_file, sim_counter, counter_lock, **kwargs):
+class GenerationCounter(Callback):
+    """
+    Callback de pymoo: lleva al problema el número de generación (sim_id)
+    y reajusta el sustituto con las simulaciones de la generación
+    """
+    def notify(self, algorithm):
+        problem = algorithm.problem
+        problem.generation = algorithm.n_gen
+        if problem.surrogate is not None:
+            problem.surrogate.fit()
+
+
+class CacheOptimizationProblem(Problem):
+    def __init__(self, workspace_dir, results_log_file, pool, pop_size, surrogate=None, **kwargs):
         self.workspace_dir = workspace_dir
         self.results_log_file = results_log_file
-        self.sim_counter = sim_counter  # ← Contador compartido
-        self.counter_lock = counter_lock  # ← Lock compartido
+        self.pool = pool  # ← Pool creado una vez en run_optimization
+        self.pop_size = pop_size
+        self.generation = 0  # ← Lo actualiza GenerationCounter
+        self.surrogate = surrogate  # ← Pre-filtro opcional (None = simular todo)
+        # Registra en el CSV las predicciones del sustituto (proceso principal)
+        self.logger = Gem5Simulator(workspace_dir, results_log_file) if surrogate is not None else None
         
         n_params = len(DESIGN_SPACE)
         xl, xu = get_bounds()
@@ -36,32 +52,59 @@ class CacheOptimizationProblem(ElementwiseProblem):
             **kwargs
         )
     
-    def _evaluate(self, x, out, *args, **kwargs):
-        """Evalúa un individuo ejecutando gem5+McPAT"""
-        # Incrementar contador de forma thread-safe
-        with self.counter_lock:
-            sim_id = self.sim_counter.value
-            self.sim_counter.value += 1
+    def __getstate__(self):
+        # El Pool no se serializa (solo vive en el proceso principal)
+        state = self.__dict__.copy()
+        state.pop("pool", None)
+        return state
+    
+    def _evaluate(self, X, out, *args, **kwargs):
+        """
+        Evalúa la población completa ejecutando gem5+McPAT: un solo envío al
+        Pool (sin serializar el problema por individuo) y los resultados
+        llegan según termina cada simulación
+        """
+        # sim_id determinista: generación * pop_size + índice (reproducible
+        # con seed=42, sin contador compartido entre procesos)
+        assert len(X) <= self.pop_size, "más individuos que pop_size: los sim_id se solaparían"
+        first_id = 1 + self.generation * self.pop_size
+        configs = decode_population(X)  # ← Toda la población de una pasada
+        F = np.empty((len(X), 3))
         
-        config = decode_individual(x)
+        # Candidatos que el sustituto da por dominados: su predicción sustituye
+        # a gem5 (conservan su sim_id y quedan marcados en el CSV)
+        skip = np.zeros(len(X), dtype=bool)
+        if self.surrogate is not None:
+            predicted, skip = self.surrogate.screen(configs)
+            for i in np.flatnonzero(skip):
+                F[i] = predicted[i]
+                self.logger.log_prediction(first_id + i, configs[i], F[i])
+            if skip.any():
+                print(f"Sustituto: {skip.sum()}/{len(X)} candidatos sin simular")
         
-        sim = Gem5Simulator(self.workspace_dir, self.results_log_file)
-        result = sim.run_simulation(config, sim_id=sim_id)
+        # Solo config + sim_id por tarea: las rutas las reciben los workers al arrancar
+        tasks = [(configs[i], first_id + i) for i in np.flatnonzero(~skip)]
         
-        metrics = result['metrics']
+        for sim_id, result, elapsed in self.pool.imap_unordered(run_single_simulation, tasks, chunksize=1):
+            i = sim_id - first_id
+            metrics = result['metrics']
+            
+            # NSGA-II minimiza, así que:
+            # - IPC: maximizar → minimizar su negativo
+            # - Energy: minimizar
+            # - EDP: minimizar
+            F[i] = [
+                -metrics['ipc'],   # Minimizar negativo = maximizar IPC
+                metrics['energy'],
+                metrics['edp']
+            ]
         
-        # NSGA-II minimiza, así que:
-        # - IPC: maximizar → minimizar su negativo
-        # - Energy: minimizar
-        # - EDP: minimizar
-        out["F"] = [
-            -metrics['ipc'],   # Minimizar negativo = maximizar IPC
-            metrics['energy'],
-            metrics['edp']
-        ]
+        out["F"] = F
 
 
-def run_optimization(workspace_dir, results_log_file, pop_size=12, n_gen=5, n_cores=6):
+def run_optimization(workspace_dir, results_log_file, pop_size=12, n_gen=5, n_cores=6,
+                     use_surrogate=False, checkpoint_dir=None, checkpoint_inst=None,
+                     max_insts=None):
     """
     Ejecuta optimización NSGA-II con paralelización
     
@@ -71,6 +114,12 @@ def run_optimization(workspace_dir, results_log_file, pop_size=12, n_gen=5, n_co
         pop_size: tamaño de población
         n_gen: número de generaciones
         n_cores: núcleos paralelos a usar
+        use_surrogate: pre-filtrar candidatos con el RandomForest de
+            surrogate.py (requiere scikit-learn)
+        checkpoint_dir: restaurar cada simulación desde este checkpoint
+            (se crea una vez en checkpoint_inst si no existe); None = no
+        checkpoint_inst: instrucción en la que se toma el checkpoint
+        max_insts: límite de instrucciones por simulación (None = sin límite)
     
     Returns:
         res: resultado de pymoo con frontera Pareto
@@ -91,22 +140,28 @@ def run_optimization(workspace_dir, results_log_file, pop_size=12, n_gen=5, n_co
             print(f"  {param}: {values}")
     print("="*70)
     
-    # ===== CONFIGURAR PARALELIZACIÓN =====
-    pool = Pool(n_cores)
-    runner = StarmapParallelization(pool.starmap)
+    # ===== CHECKPOINT (UNA VEZ, ANTES DEL POOL) =====
+    if checkpoint_dir is not None:
+        xl, _ = get_bounds()
+        ckpt_sim = Gem5Simulator(workspace_dir, checkpoint_dir=checkpoint_dir)
+        if not ckpt_sim.take_checkpoint(decode_individual(xl), checkpoint_inst):
+            print(f"Checkpoint no disponible en {checkpoint_dir}: se simula desde el principio")
+            checkpoint_dir = None
     
-    # ===== CREAR CONTADOR COMPARTIDO + LOCK =====
-    manager = Manager()
-    sim_counter = manager.Value('i', 1)  # Contador compartido (empieza en 1)
-    counter_lock = manager.Lock()        # Lock para sincronización
+    # ===== CONFIGURAR PARALELIZACIÓN =====
+    # Rutas y opciones por initargs: no depende de que el método de arranque
+    # por defecto sea fork (spawn/forkserver no heredan las globales)
+    sim_options = {"checkpoint_dir": checkpoint_dir, "max_insts": max_insts}
+    pool = Pool(n_cores, initializer=init_worker,
+                initargs=(workspace_dir, results_log_file, sim_options))
     
     # Crear problema con paralelización
     problem = CacheOptimizationProblem(
         workspace_dir=workspace_dir,
         results_log_file=results_log_file,
-        sim_counter=sim_counter,
-        counter_lock=counter_lock,  # ← Pasar lock
-        elementwise_runner=runner
+        pool=pool,
+        pop_size=pop_size,
+        surrogate=Surrogate(results_log_file) if use_surrogate else None
     )
     
     # Configurar algoritmo NSGA-II
@@ -126,6 +181,7 @@ def run_optimization(workspace_dir, results_log_file, pop_size=12, n_gen=5, n_co
         algorithm,
         ('n_gen', n_gen),
         seed=42,
+        callback=GenerationCounter(),
         verbose=True
     )
     
@@ -5,22 +5,157 @@ Calcula: IPC, Energy, EDP (Energy-Delay Product)
 import subprocess
 import tempfile
 import os
-import re
 import json
+import collections
+import datetime
+import traceback
+import math
+import hashlib
+import fcntl
 from pathlib import Path
 from multiprocessing import Pool
 import time
 
 
+# Campos de la salida de McPAT (prefijo de línea -> clave de métricas)
+_MCPAT_FIELDS = {b"Runtime Dynamic": "runtime_dynamic", b"Total Leakage": "total_leakage"}
+
+
+def _remove_tree(path):
+    """
+    Borra un directorio con os.scandir + unlink: el tipo de cada entrada
+    sale de la propia lectura del directorio, sin el lstat por fichero
+    que hace shutil.rmtree. Los errores solo se avisan (como ignore_errors):
+    se llama desde un finally y no debe tapar el resultado de la simulación.
+    """
+    try:
+        _remove_entries(path)
+    except OSError as e:
+        print(f"Aviso: no se pudo borrar {path}: {e}")
+
+
+def _remove_entries(path):
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _remove_entries(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
+
+
+# Configuraciones que fallaron hace poco en este worker (LRU de claves):
+# si la mutación las repite no se vuelve a esperar a gem5 (p.ej. 30 min de
+# timeout). Es por proceso: cada worker del Pool tiene el suyo.
+_FAIL_CACHE = collections.OrderedDict()
+_FAIL_CACHE_SIZE = 128
+
+
+def _remember_failure(key):
+    """Añade key al LRU de fallos, descartando la más antigua si está lleno"""
+    _FAIL_CACHE[key] = True
+    _FAIL_CACHE.move_to_end(key)
+    if len(_FAIL_CACHE) > _FAIL_CACHE_SIZE:
+        _FAIL_CACHE.popitem(last=False)
+
+
+def config_key(config):
+    """Hash estable de una configuración (clave de la caché de resultados)"""
+    return hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+class SimCache:
+    """
+    Caché persistente de resultados: un JSON por línea {"key", "metrics"}.
+    La comparten todos los workers (append bajo flock) y las ejecuciones
+    siguientes; cada proceso lee incrementalmente las líneas nuevas.
+    """
+    def __init__(self, cache_file):
+        self.cache_file = Path(cache_file)
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self._offset = 0
+        self._entries = {}
+    
+    def _refresh(self):
+        """Lee las líneas añadidas desde la última lectura"""
+        if not self.cache_file.exists():
+            return
+        with open(self.cache_file, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return
+        self._offset += end + 1
+        for line in chunk[:end].splitlines():
+            try:
+                entry = json.loads(line)
+                metrics = entry["metrics"]
+                # Entradas antiguas con McPAT fallido (potencia 0) no se reutilizan
+                if metrics["total_power"] > 0:
+                    self._entries[entry["key"]] = metrics
+            except (ValueError, KeyError, TypeError):
+                continue
+    
+    def get(self, key):
+        """Métricas guardadas para key o None"""
+        if key not in self._entries:
+            self._refresh()
+        return self._entries.get(key)
+    
+    def put(self, key, metrics):
+        """Añade un resultado (escritura atómica respecto a otros workers)"""
+        line = json.dumps({"key": key, "metrics": metrics}) + "\n"
+        with open(self.cache_file, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(line)
+            finally:
+                f.flush()
+                fcntl.flock(f, fcntl.LOCK_UN)
+        self._entries[key] = metrics
+
+
+# Una caché por proceso y fichero
+_sim_caches = {}
+
+
+def _get_sim_cache(cache_file):
+    cache_file = str(cache_file)
+    if cache_file not in _sim_caches:
+        _sim_caches[cache_file] = SimCache(cache_file)
+    return _sim_caches[cache_file]
+
+
 class Gem5Simulator:
-    def __init__(self, workspace_dir, results_log_file=None):
+    def __init__(self, workspace_dir, results_log_file=None, cache_path=None,
+                 checkpoint_dir=None, max_insts=None):
         """
         Args:
             workspace_dir: ruta a ~/Arquitectura_Computadores
             results_log_file: archivo CSV para guardar resultados (opcional)
+            cache_path: fichero de la caché de resultados
+                        (por defecto workspace_dir/.sim_cache/results.jsonl)
+            checkpoint_dir: directorio con el checkpoint tomado tras la
+                            inicialización de mp3_enc (ver take_checkpoint);
+                            None = simular el workload desde el principio
+            max_insts: límite de instrucciones por simulación (None = sin límite)
         """
         self.workspace_dir = Path(workspace_dir)
         self.results_log_file = results_log_file
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.max_insts = max_insts
+        # Los resultados con checkpoint/límite no son comparables con los
+        # completos: el modo de ejecución entra en la clave de la caché
+        self._run_mode = {}
+        if self.checkpoint_dir is not None:
+            self._run_mode["checkpoint_dir"] = str(self.checkpoint_dir)
+        if max_insts:
+            self._run_mode["max_insts"] = int(max_insts)
+        if cache_path is None:
+            cache_path = self.workspace_dir / ".sim_cache" / "results.jsonl"
+        self.cache = _get_sim_cache(cache_path)
+        self.csv_handle = None  # ← Descriptor persistente (lo abre init_worker)
         
         self.gem5_binary = self.workspace_dir / "gem5/build/ARM/gem5.fast"
         self.config_script = self.workspace_dir / "gem5/scripts/CortexA76_scripts_gem5/CortexA76.py"
@@ -44,6 +179,12 @@ class Gem5Simulator:
         # Crear header del CSV si el archivo no existe
         if self.results_log_file and not Path(self.results_log_file).exists():
             self._create_csv_header()
+        
+        # CSVs anteriores no tienen la columna "surrogate": se respeta su formato
+        self.surrogate_column = False
+        if self.results_log_file:
+            with open(self.results_log_file) as f:
+                self.surrogate_column = f.readline().rstrip("\n").endswith(",surrogate")
     
     def _create_csv_header(self):
         """Crea el header del CSV con todos los parámetros y métricas"""
@@ -60,7 +201,9 @@ class Gem5Simulator:
             # Métricas (9 columnas)
             "ipc", "cpi", "energy", "edp",
             "runtime_power", "leakage_power", "total_power",
-            "sim_seconds", "sim_ticks"
+            "sim_seconds", "sim_ticks",
+            # True si la fila es una predicción del sustituto (sin gem5)
+            "surrogate"
         ]
         
         with open(self.results_log_file, 'w') as f:
@@ -87,6 +230,21 @@ class Gem5Simulator:
                 }
             }
         """
+        # Configuración ya simulada: devolver el resultado sin lanzar gem5
+        key = config_key({**config, **self._run_mode})
+        cached = self.cache.get(key)
+        if cached is not None:
+            print(f"[Sim {sim_id}] Cached - IPC={cached['ipc']:.4f} Energy={cached['energy']:.4f}J EDP={cached['edp']:.6f}")
+            return {"config": config, "metrics": cached}
+        
+        # Configuración que acaba de fallar: inválida sin lanzar gem5
+        if key in _FAIL_CACHE:
+            _FAIL_CACHE.move_to_end(key)
+            print(f"[Sim {sim_id}] Skipped - falló en una simulación anterior")
+            metrics = self._get_invalid_metrics()
+            self._log_result(sim_id, config, metrics)
+            return {"config": config, "metrics": metrics}
+        
         # Crear directorio temporal en /dev/shm (RAM disk, ultra rápido)
         tmpdir = f"/dev/shm/sim_{sim_id:04d}"
         os.makedirs(tmpdir, exist_ok=True)
@@ -96,16 +254,20 @@ class Gem5Simulator:
             cmd = self._build_gem5_command(config, tmpdir)
             
             print(f"[Sim {sim_id}] Running... ", end="", flush=True)
+            # stdout de gem5 se descarta; stderr solo se decodifica si falla
             result = subprocess.run(
                 cmd,
                 cwd=str(self.workspace_dir / "gem5"),
-                capture_output=True,
-                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 timeout=1800  # 30 minutos máximo
             )
             
             if result.returncode != 0:
                 print(f"FAILED")
+                if result.stderr:
+                    print(f"    STDERR: {result.stderr[-500:].decode(errors='replace')}")
+                _remember_failure(key)
                 metrics = self._get_invalid_metrics()
                 self._log_result(sim_id, config, metrics)
                 return {"config": config, "metrics": metrics}
@@ -116,6 +278,7 @@ class Gem5Simulator:
             
             if not stats_file.exists():
                 print(f"FAILED (no stats)")
+                _remember_failure(key)
                 metrics = self._get_invalid_metrics()
                 self._log_result(sim_id, config, metrics)
                 return {"config": config, "metrics": metrics}
@@ -129,8 +292,18 @@ class Gem5Simulator:
             # ===== PASO 3: Calcular métricas finales =====
             metrics = self._calculate_final_metrics(gem5_metrics, mcpat_metrics)
             
-            # ===== PASO 4: Guardar resultado en CSV =====
+            # McPAT fallido (o sin tiempo) deja potencia 0 → energy = EDP = 0:
+            # sería un punto imbatible, así que cuenta como fallo y no se cachea
+            if metrics['ipc'] <= 0 or metrics['total_power'] <= 0:
+                print(f"FAILED (McPAT)" if metrics['ipc'] > 0 else f"FAILED")
+                _remember_failure(key)
+                metrics = self._get_invalid_metrics()
+                self._log_result(sim_id, config, metrics)
+                return {"config": config, "metrics": metrics}
+            
+            # ===== PASO 4: Guardar resultado en CSV y en la caché =====
             self._log_result(sim_id, config, metrics)
+            self.cache.put(key, metrics)
             
             print(f"OK - IPC={metrics['ipc']:.4f} Energy={metrics['energy']:.4f}J EDP={metrics['edp']:.6f}")
             
@@ -138,14 +311,15 @@ class Gem5Simulator:
         
         except subprocess.TimeoutExpired:
             print(f"TIMEOUT")
+            _remember_failure(key)
             metrics = self._get_invalid_metrics()
             self._log_result(sim_id, config, metrics)
             return {"config": config, "metrics": metrics}
         
         except Exception as e:
             print(f"ERROR: {e}")
-            import traceback
             traceback.print_exc()
+            _remember_failure(key)
             metrics = self._get_invalid_metrics()
             self._log_result(sim_id, config, metrics)
             return {"config": config, "metrics": metrics}
@@ -153,19 +327,34 @@ class Gem5Simulator:
         finally:
             # Limpiar directorio temporal
             if os.path.exists(tmpdir):
-                import shutil
-                shutil.rmtree(tmpdir)
+                _remove_tree(tmpdir)
     
-    def _log_result(self, sim_id, config, metrics):
+    def log_prediction(self, sim_id, config, F):
+        """
+        Registra en el CSV una predicción del sustituto F = (-IPC, Energy, EDP)
+        con surrogate=True (no se guarda en la caché de resultados)
+        """
+        ipc = -float(F[0])
+        metrics = self._get_invalid_metrics()
+        metrics.update({
+            "ipc": ipc,
+            "cpi": 1.0 / ipc if ipc > 0 else float('inf'),
+            "energy": float(F[1]),
+            "edp": float(F[2])
+        })
+        self._log_result(sim_id, config, metrics, surrogate=True)
+    
+    def _log_result(self, sim_id, config, metrics, surrogate=False):
         """
         Guarda resultado en CSV
         
-        Formato: sim_id, timestamp, config_params..., metrics...
+        Formato: sim_id, timestamp, config_params..., metrics..., surrogate
         """
         if not self.results_log_file:
             return
-        
-        import datetime
+        # Sin la columna no se distinguirían las predicciones de las reales
+        if surrogate and not self.surrogate_column:
+            return
         
         row = [
             str(sim_id),
@@ -184,18 +373,33 @@ class Gem5Simulator:
             f"{metrics['total_power']:.6f}",
             f"{metrics['sim_seconds']:.6f}", str(metrics['sim_ticks'])
         ]
-        
-        # Escribir en CSV (thread-safe para multiprocessing)
-        with open(self.results_log_file, 'a') as f:
-            f.write(",".join(row) + "\n")
+        if self.surrogate_column:
+            row.append(str(surrogate))
+        
+        # Escribir en CSV (seguro entre procesos: flock + flush de la línea
+        # completa dentro del lock, así ningún worker parte la de otro)
+        if self.csv_handle is not None:
+            fh = self.csv_handle
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                fh.write(",".join(row) + "\n")
+                fh.flush()
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+        else:
+            with open(self.results_log_file, 'a') as f:
+                f.write(",".join(row) + "\n")
     
-    def _build_gem5_command(self, config, outdir):
+    def _build_gem5_command(self, config, outdir, restore=True):
         """Construye el comando gem5 con los parámetros"""
         output_mp3 = f"/tmp/out_{os.getpid()}_{config['L1D_size']}_{config['L2_size']}.mp3"
         
         cmd = [
             str(self.gem5_binary),
             f"--outdir={outdir}",
+            # Solo stats.txt y config.json (los usa McPAT): sin config.ini ni config.dot
+            "--dump-config=",
+            "--dot-config=",
             str(self.config_script),
             "--cmd", str(self.workload_binary),
             "--options", f"{self.workload_input} {output_mp3}",
@@ -219,8 +423,54 @@ class Gem5Simulator:
             "--num_fu_write", str(config["num_fu_write"]),
         ]
         
+        if not restore:
+            return cmd
+        
+        # Fast-forward: se restaura el checkpoint (cogido con una CPU simple
+        # tras la inicialización del workload) y se pasa a la O3. Solo los
+        # parámetros de cachés/LQ/SQ/FU afectan a la parte simulada.
+        if self.checkpoint_dir is not None:
+            cmd += ["--checkpoint-dir", str(self.checkpoint_dir),
+                    "-r", "1",
+                    "--restore-with-cpu", "TimingSimpleCPU"]
+        if self.max_insts:
+            cmd += ["--maxinsts", str(self.max_insts)]
+        
         return cmd
     
+    def take_checkpoint(self, config, at_instruction):
+        """
+        Ejecuta gem5 una sola vez hasta at_instruction y deja el checkpoint
+        en checkpoint_dir (no hace nada si ya existe uno)
+        
+        Returns:
+            bool: True si hay checkpoint disponible
+        """
+        if self.checkpoint_dir is None:
+            return False
+        if any(self.checkpoint_dir.glob("cpt.*")):
+            return True
+        
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        cmd = self._build_gem5_command(config, self.checkpoint_dir, restore=False)
+        cmd += ["--checkpoint-dir", str(self.checkpoint_dir),
+                "--take-checkpoints", str(at_instruction), "--at-instruction"]
+        
+        print(f"Creando checkpoint en {self.checkpoint_dir} (instrucción {at_instruction})...")
+        try:
+            result = subprocess.run(
+                cmd,
+                cwd=str(self.workspace_dir / "gem5"),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            print(f"    ERROR: {e}")
+            return False
+        if result.returncode != 0 and result.stderr:
+            print(f"    STDERR: {result.stderr[-500:].decode(errors='replace')}")
+        return any(self.checkpoint_dir.glob("cpt.*"))
+    
     def _parse_gem5_stats(self, stats_file):
         """
         Parsea stats.txt de gem5
@@ -235,25 +485,30 @@ class Gem5Simulator:
             "sim_ticks": None,
         }
         
-        with open(stats_file, 'r') as f:
-            content = f.read()
-        
-        # Buscar CPI (system.cpu.cpi)
-        match = re.search(r'system\.cpu\.cpi\s+(\d+\.\d+)', content)
-        if match:
-            metrics["cpi"] = float(match.group(1))
+        # Recorrido línea a línea (gem5 escribe "nombre valor ..."): las tres
+        # claves están al principio del volcado, así que se sale en cuanto
+        # aparecen todas, sin leer el fichero entero ni usar regex. En binario
+        # no hay decodificación UTF-8 (int()/float() aceptan bytes)
+        wanted = {b"system.cpu.cpi": "cpi", b"simSeconds": "sim_seconds", b"simTicks": "sim_ticks"}
+        with open(stats_file, 'rb') as f:
+            for line in f:
+                parts = line.split(None, 2)
+                if len(parts) < 2 or parts[0] not in wanted:
+                    continue
+                name = wanted[parts[0]]
+                try:
+                    value = int(parts[1]) if name == "sim_ticks" else float(parts[1])
+                except ValueError:
+                    continue
+                if math.isfinite(value):
+                    metrics[name] = value
+                    del wanted[parts[0]]
+                    if not wanted:
+                        break
+        
+        if metrics["cpi"] is not None:
             metrics["ipc"] = 1.0 / metrics["cpi"] if metrics["cpi"] > 0 else 0.0
         
-        # Buscar sim_seconds
-        match = re.search(r'simSeconds\s+(\d+\.\d+)', content)
-        if match:
-            metrics["sim_seconds"] = float(match.group(1))
-        
-        # Buscar sim_ticks
-        match = re.search(r'simTicks\s+(\d+)', content)
-        if match:
-            metrics["sim_ticks"] = int(match.group(1))
-        
         # Verificar que se encontró CPI
         if metrics["cpi"] is None:
             metrics["cpi"] = float('inf')
@@ -273,12 +528,7 @@ class Gem5Simulator:
         
         try:
             # Generar config.xml para McPAT
-            subprocess.run([
-                "python3", str(self.mcpat_script),
-                str(stats_file),
-                str(config_json),
-                str(self.mcpat_template)
-            ], cwd=tmpdir, check=True, capture_output=True, timeout=60)
+            self._gem5_to_mcpat(tmpdir, stats_file, config_json)
             
             # Ejecutar McPAT
             with open(mcpat_output, "w") as mf:
@@ -296,6 +546,20 @@ class Gem5Simulator:
         except Exception as e:
             return {"runtime_dynamic": 0.0, "total_leakage": 0.0}
     
+    def _gem5_to_mcpat(self, tmpdir, stats_file, config_json):
+        """
+        Genera config.xml con gem5toMcPAT en un intérprete aparte (con límite
+        de tiempo y sin estado compartido con el worker). -S evita cargar
+        site al arrancar: el script solo usa la biblioteca estándar.
+        """
+        subprocess.run([
+            "python3", "-S", str(self.mcpat_script),
+            str(stats_file),
+            str(config_json),
+            str(self.mcpat_template)
+        ], cwd=tmpdir, check=True, stdout=subprocess.DEVNULL,
+           stderr=subprocess.DEVNULL, timeout=60)
+    
     def _parse_mcpat_output(self, mcpat_output):
         """
         Parsea salida_mcpat.txt
@@ -312,18 +576,31 @@ class Gem5Simulator:
             "total_leakage": 0.0
         }
         
-        with open(mcpat_output, 'r') as f:
-            content = f.read()
-        
-        # Buscar "Runtime Dynamic = X W"
-        match = re.search(r'Runtime Dynamic\s*=\s*(\d+\.?\d*)\s*W', content)
-        if match:
-            metrics["runtime_dynamic"] = float(match.group(1))
-        
-        # Buscar "Total Leakage = Y W"
-        match = re.search(r'Total Leakage\s*=\s*(\d+\.?\d*)\s*W', content)
-        if match:
-            metrics["total_leakage"] = float(match.group(1))
+        # Una pasada por líneas en binario: vale el primer valor de cada campo
+        # (el del procesador completo) y se para en cuanto están los dos
+        pending = dict(_MCPAT_FIELDS)
+        with open(mcpat_output, 'rb') as f:
+            for line in f:
+                line = line.lstrip()
+                for prefix, key in pending.items():
+                    if line.startswith(prefix):
+                        break
+                else:
+                    continue
+                label, sep, value = line.partition(b"=")
+                if not sep or label.rstrip() != prefix:
+                    continue
+                parts = value.split()
+                number = parts[0].rstrip(b"W") if parts else b""
+                if not number[:1].isdigit():  # ni nan ni negativos
+                    continue
+                try:
+                    metrics[key] = float(number)
+                except ValueError:
+                    continue
+                del pending[prefix]
+                if not pending:
+                    break
         
         return metrics
     
@@ -381,25 +658,60 @@ class Gem5Simulator:
         }
 
 
+# ===== SIMULADOR POR WORKER =====
+# Se crea una vez por proceso en el initializer del Pool (no en cada tarea):
+# las comprobaciones de rutas y la cabecera del CSV se hacen una sola vez y
+# el CSV queda abierto para append.
+_SIM = None
+
+# Rutas del workspace: se fijan en el proceso principal antes de crear el
+# Pool, así los workers (fork) las heredan y no viajan en cada tarea
+_WORKSPACE_DIR = None
+_RESULTS_LOG_FILE = None
+_SIM_OPTIONS = {}  # ← checkpoint_dir / max_insts del Gem5Simulator
+
+
+def set_worker_paths(workspace_dir, results_log_file=None, **sim_options):
+    """Fija las rutas globales que usan los workers (llamar antes de Pool())"""
+    global _WORKSPACE_DIR, _RESULTS_LOG_FILE, _SIM_OPTIONS
+    _WORKSPACE_DIR = workspace_dir
+    _RESULTS_LOG_FILE = results_log_file
+    _SIM_OPTIONS = sim_options
+
+
+def init_worker(workspace_dir=None, results_log_file=None, sim_options=None):
+    """Initializer del Pool: Gem5Simulator persistente + CSV abierto"""
+    global _SIM
+    if workspace_dir is not None:
+        # Con 'spawn'/'forkserver' no hay herencia: rutas y opciones llegan
+        # por initargs
+        set_worker_paths(workspace_dir, results_log_file, **(sim_options or {}))
+    _SIM = Gem5Simulator(_WORKSPACE_DIR, _RESULTS_LOG_FILE, **_SIM_OPTIONS)
+    if _RESULTS_LOG_FILE:
+        _SIM.csv_handle = open(_RESULTS_LOG_FILE, 'a', buffering=8192)
+
+
 # ===== FUNCIÓN WRAPPER PARA PARALELIZACIÓN =====
 def run_single_simulation(args):
     """
     Wrapper para ejecutar una simulación (necesario para multiprocessing.Pool)
     
     Args:
-        args: tupla (workspace_dir, config, sim_id, name, results_log_file)
+        args: tupla (config, sim_id); las rutas son globales del worker
     
     Returns:
-        tupla (name, result, elapsed_time)
+        tupla (sim_id, result, elapsed_time)
     """
-    workspace_dir, config, sim_id, name, results_log_file = args
+    config, sim_id = args
     
-    # Crear simulador (cada proceso necesita su propia instancia)
-    sim = Gem5Simulator(workspace_dir, results_log_file)
+    # Simulador del worker (sin initializer se crea aquí la primera vez)
+    if _SIM is None:
+        init_worker()
+    sim = _SIM
     
     # Ejecutar simulación con timer
     start = time.time()
     result = sim.run_simulation(config, sim_id)
     elapsed = time.time() - start
     
-    return (name, result, elapsed)
\ No newline at end of file
+    return (sim_id, result, elapsed)
@@ -0,0 +1,119 @@
+"""
+Modelo sustituto para pre-filtrar candidatos del NSGA-II sin lanzar gem5
+
+Con las simulaciones reales del CSV se ajusta un RandomForest (scikit-learn)
+que predice (-IPC, Energy, EDP) a partir de los 12 parámetros. Cada árbol da
+una predicción de los tres objetivos: la fracción de árboles cuya predicción
+queda dominada por la frontera de Pareto real se usa como probabilidad de que
+el candidato esté dominado. Por encima del umbral se devuelve la predicción
+en vez de simular.
+
+Sin scikit-learn no hay sustituto y se simula todo.
+"""
+import csv
+import os
+import numpy as np
+
+from design_space import DESIGN_SPACE
+
+
+_PARAMS = list(DESIGN_SPACE.keys())
+# Índice de cada valor dentro de sus opciones (el CSV guarda texto)
+_OPTION_INDEX = [{str(v): i for i, v in enumerate(values)} for values in DESIGN_SPACE.values()]
+
+
+def config_features(config):
+    """Vector de índices de opción (mismo encoding que el genoma de pymoo)"""
+    return [_OPTION_INDEX[j][str(config[p])] for j, p in enumerate(_PARAMS)]
+
+
+def _pareto_mask(F):
+    """True para las filas de F que ningún otro punto domina (minimización)"""
+    dominates = ((F[:, None] <= F[None]).all(axis=2) &
+                 (F[:, None] < F[None]).any(axis=2))  # [i, j]: i domina a j
+    return ~dominates.any(axis=0)
+
+
+class Surrogate:
+    def __init__(self, results_log_file, min_samples=20, threshold=0.8, n_estimators=50):
+        """
+        Args:
+            results_log_file: CSV de resultados que escribe Gem5Simulator
+            min_samples: simulaciones reales válidas antes de usar el modelo
+            threshold: probabilidad de estar dominado a partir de la cual
+                       no se simula
+            n_estimators: árboles del RandomForest
+        """
+        self.results_log_file = results_log_file
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.n_estimators = n_estimators
+
+        self.model = None
+        self.frontier = np.empty((0, 3))
+        self._seen = set()      # configuraciones ya simuladas (no se predicen)
+        self._fitted_n = 0
+
+    def _load(self):
+        """Filas reales válidas del CSV como (X, F)"""
+        X, F = [], []
+        if self.results_log_file and os.path.exists(self.results_log_file):
+            with open(self.results_log_file, newline='') as f:
+                for row in csv.DictReader(f):
+                    if row.get("surrogate") == "True":
+                        continue
+                    try:
+                        ipc = float(row["ipc"])
+                        F_row = [-ipc, float(row["energy"]), float(row["edp"])]
+                        feats = config_features(row)
+                    except (KeyError, ValueError, TypeError):
+                        continue
+                    if ipc <= 0:
+                        continue
+                    X.append(feats)
+                    F.append(F_row)
+        return (np.array(X, dtype=np.float64).reshape(-1, len(_PARAMS)),
+                np.array(F, dtype=np.float64).reshape(-1, 3))
+
+    def fit(self):
+        """Reajusta el bosque con todas las simulaciones reales del CSV"""
+        try:
+            from sklearn.ensemble import RandomForestRegressor
+        except ImportError:
+            return
+
+        X, F = self._load()
+        if len(X) < self.min_samples or len(X) == self._fitted_n:
+            return
+
+        model = RandomForestRegressor(n_estimators=self.n_estimators, random_state=42)
+        model.fit(X, F)
+        self.model = model
+        self.frontier = F[_pareto_mask(F)]
+        self._seen = {tuple(x) for x in X.astype(int).tolist()}
+        self._fitted_n = len(X)
+
+    def screen(self, configs):
+        """
+        Predice los objetivos de cada configuración y marca las que
+        probablemente están dominadas por la frontera actual
+
+        Returns:
+            (predicción (n, 3) o None, máscara bool (n,) de "no simular")
+        """
+        skip = np.zeros(len(configs), dtype=bool)
+        if self.model is None or len(configs) == 0:
+            return None, skip
+
+        X = np.array([config_features(c) for c in configs], dtype=np.float64)
+        per_tree = np.stack([tree.predict(X) for tree in self.model.estimators_])  # (T, n, 3)
+
+        # dominated[t, i]: algún punto de la frontera domina la predicción del árbol t
+        P = per_tree[:, :, None, :]
+        front = self.frontier[None, None]
+        dominated = ((front <= P).all(axis=3) & (front < P).any(axis=3)).any(axis=2)
+
+        skip = dominated.mean(axis=0) > self.threshold
+        # Lo ya simulado nunca se sustituye por una predicción
+        skip &= np.array([tuple(x) not in self._seen for x in X.astype(int).tolist()])
+        return per_tree.mean(axis=0), skip
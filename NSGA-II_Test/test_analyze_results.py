@@ -0,0 +1,57 @@
+"""
+analyze_results.py no debe contar las predicciones del sustituto
+(surrogate=True) como simulaciones
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("matplotlib")
+
+SCRIPT = Path(__file__).resolve().parent / "analyze_results.py"
+
+HEADER = [
+    "sim_id", "timestamp",
+    "L1I_size", "L1I_assoc", "L1D_size", "L1D_assoc",
+    "L2_size", "L2_assoc", "L3_size", "L3_assoc",
+    "load_queue", "store_queue", "num_fu_read", "num_fu_write",
+    "ipc", "cpi", "energy", "edp",
+    "runtime_power", "leakage_power", "total_power",
+    "sim_seconds", "sim_ticks", "surrogate",
+]
+
+
+def _row(sim_id, ipc, energy, surrogate):
+    return [
+        str(sim_id), "2025-01-01T00:00:00",
+        "32kB", "2", "32kB", "2", "256kB", "4", "2MB", "8",
+        "16", "16", "2", "2",
+        f"{ipc:.6f}", f"{1 / ipc:.6f}", f"{energy:.6f}", f"{energy / ipc:.10f}",
+        "1.0", "0.5", "1.5", "0.01", "1000", str(surrogate),
+    ]
+
+
+def test_surrogate_rows_are_excluded(tmp_path):
+    rows = [_row(i, 1.0 + i / 10, 2.0 + i / 10, False) for i in range(4)]
+    # Predicciones con el mejor IPC/energía: si se contaran, serían el "mejor"
+    rows += [_row(100 + i, 9.0, 0.1, True) for i in range(3)]
+    with open(tmp_path / "nsga2_results.csv", "w") as f:
+        f.write(",".join(HEADER) + "\n")
+        for row in rows:
+            f.write(",".join(row) + "\n")
+
+    out = subprocess.run(
+        [sys.executable, str(SCRIPT)], cwd=tmp_path,
+        env={**os.environ, "MPLBACKEND": "Agg"},
+        capture_output=True, text=True, check=True,
+    ).stdout
+
+    assert "Total simulaciones: 4" in out
+    assert "Simulaciones válidas: 4" in out
+    assert "Predicciones del sustituto (excluidas): 3" in out
+    assert "MEJOR IPC = 1.3000" in out
+    assert "9.0000" not in out
@@ -0,0 +1,79 @@
+"""Helpers shared by the profiling scripts.
+
+ - iter_stats_files: the stats_dir/<experiment>/stats.txt files that
+   cache_profiling.py, inst_profiling.py and parse_data.py parse
+ - load_data: the profile CSV reader used by plot_cache.py and plot_inst.py
+ - reset_subplot_params: undo the previous tight_layout on a reused figure
+
+Only the standard library is imported here; numpy is loaded by load_data
+when a plot script actually reads a CSV.
+"""
+
+import csv
+import math
+import os
+from pathlib import Path
+
+
+def iter_stats_files(stats_dir):
+    """Yield (experiment, path) for every stats_dir/<experiment>/stats.txt.
+
+    The stats are one level deep, so a single os.scandir is enough (no
+    recursion or extra stat calls as with os.walk); order is directory order.
+    """
+    with os.scandir(stats_dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                path = os.path.join(entry.path, "stats.txt")
+                if os.path.isfile(path):
+                    yield entry.name, path
+
+
+def _to_number(text: str) -> float:
+    # non-numeric or empty cells count as 0 (same as to_numeric + fillna(0))
+    try:
+        value = float(text)
+    except ValueError:
+        return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+def load_data(csv_path: Path):
+    """Read the CSV with the csv module.
+
+    Returns (experiments, data): the experiment names in file order and a
+    dict mapping every other column to a float NumPy array.
+    """
+    import numpy as np
+
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+    with csv_path.open(newline="") as f:
+        rows = [row for row in csv.reader(f) if row]
+    header = rows[0] if rows else []
+    if "experiment" not in header:
+        raise ValueError("CSV must contain an 'experiment' column")
+    rows = rows[1:]
+    exp_idx = header.index("experiment")
+    experiments = [row[exp_idx] for row in rows]
+    data = {}
+    for j, name in enumerate(header):
+        if j != exp_idx:
+            data[name] = np.fromiter(
+                (_to_number(row[j]) if j < len(row) else 0.0 for row in rows),
+                dtype=float, count=len(rows),
+            )
+    return experiments, data
+
+
+def reset_subplot_params(fig):
+    """Restore the rcParams subplot margins on a figure reused across charts.
+
+    ax.clear() keeps the margins the previous tight_layout() set, so without
+    this every chart after the first would start its layout from the last
+    one instead of from the defaults a fresh figure gets.
+    """
+    import matplotlib as mpl
+
+    fig.subplots_adjust(**{k: mpl.rcParams[f"figure.subplot.{k}"]
+                           for k in ("left", "right", "bottom", "top", "wspace", "hspace")})
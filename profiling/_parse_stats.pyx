@@ -0,0 +1,125 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# -*- coding: utf-8 -*-
+"""
+Núcleo en C de inst_profiling.parse_all: recorre el stats.txt con memchr
+(una línea cada vez) y compara los prefijos con memcmp, sin crear objetos
+Python salvo para las claves y contadores que se devuelven.
+
+Se compila al importarlo con pyximport (ver _get_parse_kernel en
+inst_profiling.py); sin Cython se usa la versión con regex.
+"""
+from collections import defaultdict
+
+from libc.string cimport memchr, memcmp
+
+cdef bytes P_OP = b"system.cpu.commit.committedInstType_0::"
+cdef bytes P_OP_TOTAL = b"system.cpu.commit.committedInstType_0::total"
+cdef bytes P_BR = b"system.cpu.branchPred.committed_"
+cdef bytes P_FU = b"system.cpu.statFuBusy::"
+cdef bytes S_TOTAL = b"::total"
+
+
+cdef inline bint _isspace(char c):
+    return c == 32 or (9 <= c <= 13)
+
+
+cdef inline bint _startswith(const char* p, Py_ssize_t n, bytes prefix):
+    cdef Py_ssize_t m = len(prefix)
+    return n >= m and memcmp(p, <const char*>prefix, m) == 0
+
+
+cdef bint _parse_int(const char* p, Py_ssize_t n, long long* out):
+    """Entero con signo opcional y solo dígitos (lo que acepta int())"""
+    cdef Py_ssize_t i = 0
+    cdef long long v = 0
+    cdef bint neg = False
+    if n > 0 and (p[0] == 43 or p[0] == 45):  # '+' / '-'
+        neg = p[0] == 45
+        i = 1
+    if i >= n:
+        return False
+    while i < n:
+        if p[i] < 48 or p[i] > 57:
+            return False
+        v = v * 10 + (p[i] - 48)
+        i += 1
+    out[0] = -v if neg else v
+    return True
+
+
+cdef inline Py_ssize_t _key_end(const char* buf, Py_ssize_t s, Py_ssize_t e):
+    """Fin de la clave tras '::' (hasta el siguiente '::' o el fin del token)"""
+    while s + 1 < e:
+        if buf[s] == 58 and buf[s + 1] == 58:
+            return s
+        s += 1
+    return e
+
+
+def parse(bytes data):
+    """
+    Devuelve (opcounts, total_committed, committed_branches, fu_counts,
+    total_fu_busy); total_committed todavía sin sumar las branches
+    """
+    cdef const char* buf = data
+    cdef Py_ssize_t n = len(data)
+    cdef Py_ssize_t pos = 0, end, s, e, t0e, t1s, t1e, k0, k1
+    cdef const char* nl
+    cdef long long val
+    cdef long long total_committed = 0, committed_branches = 0, total_fu_busy = 0
+
+    opcounts = defaultdict(int)
+    fu_counts = defaultdict(int)
+
+    while pos < n:
+        nl = <const char*>memchr(buf + pos, 10, n - pos)
+        end = (nl - buf) if nl != NULL else n
+
+        # Primer token (nombre) y segundo token (valor) de la línea
+        s = pos
+        while s < end and _isspace(buf[s]):
+            s += 1
+        t0e = s
+        while t0e < end and not _isspace(buf[t0e]):
+            t0e += 1
+        t1s = t0e
+        while t1s < end and _isspace(buf[t1s]):
+            t1s += 1
+        t1e = t1s
+        while t1e < end and not _isspace(buf[t1e]):
+            t1e += 1
+        pos = end + 1
+
+        if t1s == t1e or not _startswith(buf + s, t0e - s, b"system.cpu."):
+            continue
+
+        if _startswith(buf + s, t0e - s, P_OP_TOTAL):
+            # --- Total de instrucciones ---
+            if _parse_int(buf + t1s, t1e - t1s, &val):
+                total_committed = val
+
+        elif _startswith(buf + s, t0e - s, P_OP):
+            # --- Clases de instrucciones ---
+            if _parse_int(buf + t1s, t1e - t1s, &val):
+                k0 = s + len(P_OP)
+                k1 = _key_end(buf, k0, t0e)
+                key = buf[k0:k1].decode("utf-8", "ignore")
+                opcounts[key] += val
+
+        elif _startswith(buf + s, t0e - s, P_BR):
+            # --- Branches comprometidas ---
+            if (t0e - s >= len(S_TOTAL)
+                    and memcmp(buf + t0e - len(S_TOTAL), <const char*>S_TOTAL, len(S_TOTAL)) == 0
+                    and _parse_int(buf + t1s, t1e - t1s, &val)):
+                committed_branches += val
+
+        elif _startswith(buf + s, t0e - s, P_FU):
+            # --- FU busy ---
+            if _parse_int(buf + t1s, t1e - t1s, &val):
+                k0 = s + len(P_FU)
+                k1 = _key_end(buf, k0, t0e)
+                key = buf[k0:k1].decode("utf-8", "ignore")
+                fu_counts[key] += val
+                total_fu_busy += val
+
+    return opcounts, total_committed, committed_branches, fu_counts, total_fu_busy
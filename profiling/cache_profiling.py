@@ -2,7 +2,12 @@
 # -*- coding: utf-8 -*-
 
 import os
-import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from _common import iter_stats_files
 
 # ------------------ Config de rutas ------------------
 
@@ -14,48 +19,60 @@ os.makedirs(STATS_DIR, exist_ok=True)
 
 # ------------------ Función de parsing ------------------
 
-def parse_cache_stats(stats_file):
+# Estadística de gem5 -> (nivel, campo). En stats.txt cada línea es
+# "nombre valor ...", así que basta una búsqueda en el dict por línea.
+# Claves en bytes: se comparan directamente con el fichero sin decodificar.
+CACHE_STAT_KEYS = {
+    # === iCache ===
+    b"system.cpu.icache.demandAccesses::total": ("icache", "accesses"),
+    b"system.cpu.icache.demandMisses::total": ("icache", "misses"),
+    # === dCache ===
+    b"system.cpu.dcache.demandAccesses::total": ("dcache", "accesses"),
+    b"system.cpu.dcache.demandMisses::total": ("dcache", "misses"),
+    # === L2 ===
+    b"system.cpu.l2cache.overallAccesses::total": ("l2", "accesses"),
+    b"system.cpu.l2cache.overallMisses::total": ("l2", "misses"),
+    # === L3 ===
+    b"system.l3cache.overallAccesses::total": ("l3", "accesses"),
+    b"system.l3cache.overallMisses::total": ("l3", "misses"),
+}
+
+LEVELS = ["icache", "dcache", "l2", "l3"]
+
+def read_cache_counts(stats_file):
     """
-    Extrae estadísticas de iCache, dCache, L2 y L3 desde un stats.txt de gem5.
-    Retorna un diccionario con accesses, misses, miss% y hit%.
+    Lee los accesses/misses de iCache, dCache, L2 y L3 de un stats.txt.
+    Retorna {nivel: {"accesses": int, "misses": int}}.
     """
-    stats = {
-        "icache": {"accesses": 0, "misses": 0},
-        "dcache": {"accesses": 0, "misses": 0},
-        "l2": {"accesses": 0, "misses": 0},
-        "l3": {"accesses": 0, "misses": 0},
-    }
+    stats = {level: {"accesses": 0, "misses": 0} for level in LEVELS}
 
     if not os.path.exists(stats_file):
         return stats
 
-    with open(stats_file, "r", encoding="utf-8", errors="ignore") as f:
-        for raw in f:
-            line = raw.strip()
-
-            # === iCache ===
-            if "system.cpu.icache.demandAccesses::total" in line:
-                stats["icache"]["accesses"] = int(line.split()[1])
-            elif "system.cpu.icache.demandMisses::total" in line:
-                stats["icache"]["misses"] = int(line.split()[1])
-
-            # === dCache ===
-            elif "system.cpu.dcache.demandAccesses::total" in line:
-                stats["dcache"]["accesses"] = int(line.split()[1])
-            elif "system.cpu.dcache.demandMisses::total" in line:
-                stats["dcache"]["misses"] = int(line.split()[1])
-
-            # === L2 ===
-            elif "system.cpu.l2cache.overallAccesses::total" in line:
-                stats["l2"]["accesses"] = int(line.split()[1])
-            elif "system.cpu.l2cache.overallMisses::total" in line:
-                stats["l2"]["misses"] = int(line.split()[1])
-
-            # === L3 ===
-            elif "system.l3cache.overallAccesses::total" in line:
-                stats["l3"]["accesses"] = int(line.split()[1])
-            elif "system.l3cache.overallMisses::total" in line:
-                stats["l3"]["misses"] = int(line.split()[1])
+    # Se corta en cuanto están los 8 valores (stats.txt de un solo volcado)
+    remaining = len(CACHE_STAT_KEYS)
+    with open(stats_file, "rb") as f:
+        data = f.read()
+
+    for line in data.splitlines():
+        parts = line.split(None, 2)
+        target = CACHE_STAT_KEYS.get(parts[0]) if len(parts) > 1 else None
+        if target:
+            level, field = target
+            stats[level][field] = int(parts[1])
+            remaining -= 1
+            if remaining == 0:
+                break
+
+    return stats
+
+
+def parse_cache_stats(stats_file):
+    """
+    Extrae estadísticas de iCache, dCache, L2 y L3 desde un stats.txt de gem5.
+    Retorna un diccionario con accesses, misses, miss% y hit%.
+    """
+    stats = read_cache_counts(stats_file)
 
     # Calcular porcentajes
     for level in stats:
@@ -80,56 +97,33 @@ def main():
         print(f"[ERROR] No existe la carpeta: {STATS_DIR}")
         return
 
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "experiment",
-            # iCache
-            "icache_accesses", "icache_misses", "icache_miss_pct", "icache_hit_pct",
-            # dCache
-            "dcache_accesses", "dcache_misses", "dcache_miss_pct", "dcache_hit_pct",
-            # L2
-            "l2_accesses", "l2_misses", "l2_miss_pct", "l2_hit_pct",
-            # L3
-            "l3_accesses", "l3_misses", "l3_miss_pct", "l3_hit_pct"
-        ])
-
-        found = 0
-        for root, _, files in os.walk(STATS_DIR):
-            if "stats.txt" in files:
-                stats_path = os.path.join(root, "stats.txt")
-                exp = os.path.basename(root)
-
-                cache_data = parse_cache_stats(stats_path)
-
-                writer.writerow([
-                    exp,
-                    # iCache
-                    cache_data["icache"]["accesses"],
-                    cache_data["icache"]["misses"],
-                    f'{cache_data["icache"]["miss_pct"]:.3f}',
-                    f'{cache_data["icache"]["hit_pct"]:.3f}',
-                    # dCache
-                    cache_data["dcache"]["accesses"],
-                    cache_data["dcache"]["misses"],
-                    f'{cache_data["dcache"]["miss_pct"]:.3f}',
-                    f'{cache_data["dcache"]["hit_pct"]:.3f}',
-                    # L2
-                    cache_data["l2"]["accesses"],
-                    cache_data["l2"]["misses"],
-                    f'{cache_data["l2"]["miss_pct"]:.3f}',
-                    f'{cache_data["l2"]["hit_pct"]:.3f}',
-                    # L3
-                    cache_data["l3"]["accesses"],
-                    cache_data["l3"]["misses"],
-                    f'{cache_data["l3"]["miss_pct"]:.3f}',
-                    f'{cache_data["l3"]["hit_pct"]:.3f}'
-                ])
-                found += 1
-                print(f"[INFO] Profiled {exp}")
+    experiments = []
+    stats_paths = []
+    for exp, stats_path in iter_stats_files(STATS_DIR):
+        experiments.append(exp)
+        stats_paths.append(stats_path)
+
+    # Cada stats.txt es independiente: se parsean en paralelo
+    with ProcessPoolExecutor() as pool:
+        counts = list(pool.map(read_cache_counts, stats_paths, chunksize=4))
+
+    # Tabla de contadores (una fila por experimento) y porcentajes vectorizados
+    df = pd.DataFrame({"experiment": experiments})
+    for level in LEVELS:
+        acc = np.array([c[level]["accesses"] for c in counts], dtype=np.int64)
+        miss = np.array([c[level]["misses"] for c in counts], dtype=np.int64)
+        miss_pct = np.divide(100.0 * miss, acc, out=np.zeros(len(acc)), where=acc > 0)
+        df[f"{level}_accesses"] = acc
+        df[f"{level}_misses"] = miss
+        df[f"{level}_miss_pct"] = miss_pct
+        df[f"{level}_hit_pct"] = np.where(acc > 0, 100.0 - miss_pct, 0.0)
+
+    df.to_csv(OUTPUT_CSV, index=False, float_format="%.3f", lineterminator="\r\n", encoding="utf-8")
+    for exp in experiments:
+        print(f"[INFO] Profiled {exp}")
 
     print(f"\n Perfil de cachés guardado en: {OUTPUT_CSV}")
-    if found == 0:
+    if not experiments:
         print("[WARN] No se encontraron stats.txt en subcarpetas de:", STATS_DIR)
 
 
@@ -2,137 +2,177 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import csv
+import mmap
+import pickle
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from _common import iter_stats_files
 
 # ------------------ Config de rutas ------------------
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATS_DIR = os.path.join(BASE_DIR, "stats")
 OUTPUT_CSV = os.path.join(STATS_DIR, "instruction_fu_profile.csv")
+# Filas ya calculadas de ejecuciones anteriores (ver load_parse_cache)
+PARSE_CACHE = os.path.join(STATS_DIR, ".parse_cache.pkl")
 
 os.makedirs(STATS_DIR, exist_ok=True)
 
-# ------------------ Parser de instrucciones ------------------
+# ------------------ Parser (una sola pasada) ------------------
 
-def parse_committed_opclasses(stats_file):
+FLOAT_SCALAR = {
+    "FloatAdd", "FloatCmp", "FloatCvt", "FloatMult", "FloatMultAcc",
+    "FloatDiv", "FloatMisc", "FloatSqrt"
+}
+
+# Opclasses de cada categoría (Load, Store, ALUint, ALUfloat), en tuplas
+# fijas para que los dos aggregate_* las sumen igual
+CATEGORY_OPS = (
+    ("MemRead", "FloatMemRead"),
+    ("MemWrite", "FloatMemWrite"),
+    ("IntAlu", "IntMult", "IntDiv"),
+    tuple(sorted(FLOAT_SCALAR)),
+)
+
+# Un único patrón para las cuatro familias de claves: el bucle sobre las
+# líneas lo hace el motor de regex (C) sobre el mmap del fichero. Sin ancla
+# "^" el motor salta directamente a cada "system.cpu."; que la clave empiece
+# la línea se comprueba después, solo para las coincidencias
+_STATS_PAT = re.compile(
+    rb"system\.cpu\.(?:"
+    rb"commit\.committedInstType_0::(?P<op>\S+)"
+    rb"|(?P<br>branchPred\.committed_\S*::total)"
+    rb"|statFuBusy::(?P<fu>\S*)"
+    rb")[ \t]+(?P<val>[-+]?\d+)(?=[ \t\r\n]|$)",
+    re.MULTILINE,
+)
+
+_parse_kernel = None
+
+def _get_parse_kernel():
+    """
+    parse() de _parse_stats.pyx, compilado con pyximport la primera vez si
+    Cython está instalado; si no, False y parse_all usa la regex
     """
-    Devuelve:
+    global _parse_kernel
+    if _parse_kernel is None:
+        try:
+            import pyximport
+            pyximport.install(language_level=3)
+            from _parse_stats import parse
+            _parse_kernel = parse
+        except ImportError:
+            _parse_kernel = False
+    return _parse_kernel
+
+
+def parse_all(stats_file):
+    """
+    Lee el stats.txt una sola vez y devuelve:
       - opcounts: diccionario (opclass -> count) de committedInstType_0
-      - total_committed: total de instrucciones comprometidas
+      - total_committed: total de instrucciones comprometidas (con branches)
       - committed_branches: número de branches comprometidas
+      - fu_counts: diccionario (opclass -> count) de statFuBusy
+      - total_fu_busy: suma de statFuBusy
     """
-    opcounts = {}
+    # defaultdict: una sola búsqueda por línea al acumular (+=)
+    opcounts = defaultdict(int)
     total_committed = 0
     committed_branches = 0
+    fu_counts = defaultdict(int)
+    total_fu_busy = 0
 
-    if not os.path.exists(stats_file):
-        return opcounts, total_committed, committed_branches
-
-    with open(stats_file, "r", encoding="utf-8", errors="ignore") as f:
-        for raw in f:
-            line = raw.strip()
-
-            # --- Total de instrucciones class---
-            if line.startswith("system.cpu.commit.committedInstType_0::total"):
-                parts = line.split()
-                if len(parts) >= 2:
-                    try:
-                        total_committed = int(parts[1])
-                    except ValueError:
-                        continue
-                continue
-
-            # --- Clases de instrucciones ---
-            if line.startswith("system.cpu.commit.committedInstType_0::"):
-                parts = line.split()
-                if len(parts) >= 2:
-                    key = parts[0].split("::")[1]
-                    try:
-                        val = int(parts[1])
-                        opcounts[key] = opcounts.get(key, 0) + val
-                    except ValueError:
-                        continue
-                continue
-
-            # --- Branches comprometidas ---
-            if line.startswith("system.cpu.branchPred.committed_"):
-                parts = line.split()
-                if len(parts) >= 2 and parts[0].endswith("::total"):
-                    try:
-                        committed_branches += int(parts[1])
-                    except ValueError:
-                        continue
-                continue
+    if not os.path.exists(stats_file) or os.path.getsize(stats_file) == 0:
+        return opcounts, total_committed, committed_branches, fu_counts, total_fu_busy
+
+    kernel = _get_parse_kernel()
+    if kernel:
+        with open(stats_file, "rb") as f:
+            opcounts, total_committed, committed_branches, fu_counts, total_fu_busy = kernel(f.read())
+        return (opcounts, total_committed + committed_branches, committed_branches,
+                fu_counts, total_fu_busy)
+
+    with open(stats_file, "rb") as f, \
+         mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in _STATS_PAT.finditer(mm):
+            start = m.start()
+            if start and mm[start - 1] != 0x0A:
+                if mm[mm.rfind(b"\n", 0, start) + 1:start].strip():
+                    continue
+            val = int(m.group("val"))
+            op = m.group("op")
+            if op is not None:
+                # --- Total / clases de instrucciones ---
+                if op.startswith(b"total"):
+                    total_committed = val
+                else:
+                    key = op.split(b"::")[0].decode()
+                    opcounts[key] += val
+            elif m.group("br") is not None:
+                # --- Branches comprometidas ---
+                committed_branches += val
+            else:
+                # --- FU busy ---
+                key = m.group("fu").split(b"::")[0].decode()
+                fu_counts[key] += val
+                total_fu_busy += val
 
     # Sumar branches al total de Instrucciones
     total_committed += committed_branches
 
-    return opcounts, total_committed, committed_branches
+    return opcounts, total_committed, committed_branches, fu_counts, total_fu_busy
 
 
-# ------------------ Parser de FU busy ------------------
+def parse_committed_opclasses(stats_file):
+    """(opcounts, total_committed, committed_branches) de parse_all"""
+    return parse_all(stats_file)[:3]
 
-FLOAT_SCALAR = {
-    "FloatAdd", "FloatCmp", "FloatCvt", "FloatMult", "FloatMultAcc",
-    "FloatDiv", "FloatMisc", "FloatSqrt"
-}
 
 def parse_fu_busy(stats_file):
     """
-    Devuelve un diccionario con el conteo de 'statFuBusy' agrupado por categorías:
-    Load, Store, ALUint, ALUfloat, Others
+    Devuelve el conteo de 'statFuBusy' por opclass y su total (parse_all);
+    las categorías las agrupa aggregate_fu_categories
     """
-    fu_counts = {}
-    total_fu_busy = 0
+    return parse_all(stats_file)[3:]
 
-    if not os.path.exists(stats_file):
-        return fu_counts, total_fu_busy
 
-    with open(stats_file, "r", encoding="utf-8", errors="ignore") as f:
-        for raw in f:
-            line = raw.strip()
+def category_counts(counts):
+    """(load, store, aluint, alufloat) sumando los opclasses de CATEGORY_OPS"""
+    get = counts.get
+    return [sum([get(op, 0) for op in ops]) for ops in CATEGORY_OPS]
 
-            if line.startswith("system.cpu.statFuBusy::"):
-                parts = line.split()
-                if len(parts) < 2:
-                    continue
-                key = parts[0].split("::")[1]
-                try:
-                    val = int(parts[1])
-                except ValueError:
-                    continue
-                fu_counts[key] = fu_counts.get(key, 0) + val
-                total_fu_busy += val
 
-    return fu_counts, total_fu_busy
+def percentages(counts, total):
+    """100*c/total de todos los conteos a la vez (0.0 si total no es > 0)"""
+    if total > 0:
+        return [100.0 * c / total for c in counts]
+    return [0.0] * len(counts)
 
 
 def aggregate_fu_categories(fu_counts, total_fu_busy):
     """
     Agrupa las métricas FU busy en categorías principales.
     """
-    def get(op):
-        return fu_counts.get(op, 0)
-
-    branch_cnt = 0  # Las FU busy no incluyen branches
-    load_cnt = get("MemRead") + get("FloatMemRead")
-    store_cnt = get("MemWrite") + get("FloatMemWrite")
-    aluint_cnt = get("IntAlu") + get("IntMult") + get("IntDiv")
-    alufloat_cnt = sum(get(op) for op in FLOAT_SCALAR)
+    # Las FU busy no incluyen branches
+    load_cnt, store_cnt, aluint_cnt, alufloat_cnt = category_counts(fu_counts)
 
     known_sum = load_cnt + store_cnt + aluint_cnt + alufloat_cnt
     others_cnt = max(total_fu_busy - known_sum, 0)
 
-    def pct(x):
-        return (100.0 * x / total_fu_busy) if total_fu_busy > 0 else 0.0
+    load_pct, store_pct, aluint_pct, alufloat_pct, others_pct = percentages(
+        (load_cnt, store_cnt, aluint_cnt, alufloat_cnt, others_cnt), total_fu_busy)
 
     return {
         "fu_total": total_fu_busy,
-        "fu_load": load_cnt,     "fu_load_pct": pct(load_cnt),
-        "fu_store": store_cnt,   "fu_store_pct": pct(store_cnt),
-        "fu_aluint": aluint_cnt, "fu_aluint_pct": pct(aluint_cnt),
-        "fu_alufloat": alufloat_cnt, "fu_alufloat_pct": pct(alufloat_cnt),
-        "fu_others": others_cnt, "fu_others_pct": pct(others_cnt),
+        "fu_load": load_cnt,     "fu_load_pct": load_pct,
+        "fu_store": store_cnt,   "fu_store_pct": store_pct,
+        "fu_aluint": aluint_cnt, "fu_aluint_pct": aluint_pct,
+        "fu_alufloat": alufloat_cnt, "fu_alufloat_pct": alufloat_pct,
+        "fu_others": others_cnt, "fu_others_pct": others_pct,
     }
 
 
@@ -144,39 +184,123 @@ def aggregate_categories(opcounts, total_committed, committed_branches):
     Branch, Load, Store, ALUint, ALUfloat, Others.
     (SIMD entra en Others por definición del usuario)
     """
-    def get(op):
-        return opcounts.get(op, 0)
-
     branch_cnt = committed_branches
-    load_cnt = get("MemRead") + get("FloatMemRead")
-    store_cnt = get("MemWrite") + get("FloatMemWrite")
-    aluint_cnt = get("IntAlu") + get("IntMult") + get("IntDiv")
-    alufloat_cnt = sum(get(op) for op in FLOAT_SCALAR)
+    load_cnt, store_cnt, aluint_cnt, alufloat_cnt = category_counts(opcounts)
 
     known_sum = branch_cnt + load_cnt + store_cnt + aluint_cnt + alufloat_cnt
     others_cnt = max(total_committed - known_sum, 0)
 
-    def pct(x):
-        return (100.0 * x / total_committed) if total_committed > 0 else 0.0
+    branch_pct, load_pct, store_pct, aluint_pct, alufloat_pct, others_pct = percentages(
+        (branch_cnt, load_cnt, store_cnt, aluint_cnt, alufloat_cnt, others_cnt), total_committed)
 
     return {
         "total_committed": total_committed,
-        "branch_cnt": branch_cnt,     "branch_pct": pct(branch_cnt),
-        "load_cnt": load_cnt,         "load_pct": pct(load_cnt),
-        "store_cnt": store_cnt,       "store_pct": pct(store_cnt),
-        "aluint_cnt": aluint_cnt,     "aluint_pct": pct(aluint_cnt),
-        "alufloat_cnt": alufloat_cnt, "alufloat_pct": pct(alufloat_cnt),
-        "others_cnt": others_cnt,     "others_pct": pct(others_cnt),
+        "branch_cnt": branch_cnt,     "branch_pct": branch_pct,
+        "load_cnt": load_cnt,         "load_pct": load_pct,
+        "store_cnt": store_cnt,       "store_pct": store_pct,
+        "aluint_cnt": aluint_cnt,     "aluint_pct": aluint_pct,
+        "alufloat_cnt": alufloat_cnt, "alufloat_pct": alufloat_pct,
+        "others_cnt": others_cnt,     "others_pct": others_pct,
     }
 
 
+# ------------------ Fila por experimento ------------------
+
+def process_one(item):
+    """
+    Parsea un stats.txt y devuelve la fila del CSV, o None si el stats está
+    incompleto (total_committed=0). item = (experimento, ruta al stats.txt).
+    Se ejecuta en los procesos del pool, así que solo devuelve datos.
+    """
+    exp, stats_path = item
+
+    opcounts, total_committed, committed_branches, fu_counts, total_fu_busy = parse_all(stats_path)
+    if total_committed == 0:
+        return None
+    instr = aggregate_categories(opcounts, total_committed, committed_branches)
+    fu = aggregate_fu_categories(fu_counts, total_fu_busy)
+
+    return [
+        exp,
+        # --- Instrucciones ---
+        instr["total_committed"],
+        instr["branch_cnt"], format(instr["branch_pct"], ".2f"),
+        instr["load_cnt"], format(instr["load_pct"], ".2f"),
+        instr["store_cnt"], format(instr["store_pct"], ".2f"),
+        instr["aluint_cnt"], format(instr["aluint_pct"], ".2f"),
+        instr["alufloat_cnt"], format(instr["alufloat_pct"], ".2f"),
+        instr["others_cnt"], format(instr["others_pct"], ".2f"),
+        # --- FU Busy ---
+        fu["fu_total"],
+        fu["fu_load"], format(fu["fu_load_pct"], ".2f"),
+        fu["fu_store"], format(fu["fu_store_pct"], ".2f"),
+        fu["fu_aluint"], format(fu["fu_aluint_pct"], ".2f"),
+        fu["fu_alufloat"], format(fu["fu_alufloat_pct"], ".2f"),
+        fu["fu_others"], format(fu["fu_others_pct"], ".2f"),
+    ]
+
+
+# ------------------ Caché entre ejecuciones ------------------
+
+# Subir si cambia process_one: invalida las filas guardadas
+PARSE_CACHE_VERSION = 1
+
+
+def stats_key(stats_path):
+    """(ruta, mtime_ns, tamaño): un stats.txt terminado ya no cambia"""
+    st = os.stat(stats_path)
+    return stats_path, st.st_mtime_ns, st.st_size
+
+
+def load_parse_cache(cache_file=PARSE_CACHE):
+    """{stats_key: fila de process_one}; vacío si no existe o no es válida"""
+    try:
+        with open(cache_file, "rb") as f:
+            cache = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != PARSE_CACHE_VERSION:
+        return {}
+    return cache.get("rows", {})
+
+
+def save_parse_cache(rows, cache_file=PARSE_CACHE):
+    """Guarda las filas (escribe a un temporal y lo renombra)"""
+    tmp = cache_file + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({"version": PARSE_CACHE_VERSION, "rows": rows}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_file)
+
+
 # ------------------ Main ------------------
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de instrucciones y FU busy")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Reparsear todos los stats.txt (ignora {os.path.basename(PARSE_CACHE)})")
+    args = parser.parse_args(argv)
+
     if not os.path.isdir(STATS_DIR):
         print(f"[ERROR] No existe la carpeta: {STATS_DIR}")
         return
 
+    paths = list(iter_stats_files(STATS_DIR))
+
+    # Solo se parsean (en paralelo) los stats.txt nuevos o modificados desde
+    # la última ejecución; el resto sale de la caché
+    keys = [stats_key(path) for _, path in paths]
+    cached = {} if args.no_cache else load_parse_cache()
+    results = {key: cached[key] for key in keys if key in cached}
+    todo = [(item, key) for item, key in zip(paths, keys) if key not in results]
+
+    if todo:
+        # Compilar/cargar el núcleo Cython antes del pool (los workers lo heredan)
+        _get_parse_kernel()
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            rows = ex.map(process_one, [item for item, _ in todo], chunksize=4)
+            results.update(zip([key for _, key in todo], rows))
+
     with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow([
@@ -198,41 +322,21 @@ def main():
             "fu_others", "fu_others_pct",
         ])
 
-        found = 0
-        for root, _, files in os.walk(STATS_DIR):
-            if "stats.txt" in files:
-                stats_path = os.path.join(root, "stats.txt")
-                exp = os.path.basename(root)
+        # El CSV solo lo escribe este proceso y en el orden del directorio;
+        # las filas se escriben de una vez con writerows
+        rows = []
+        for (exp, _), key in zip(paths, keys):
+            row = results[key]
+            if row is None:
+                print(f"[WARN] {exp}: total_committed=0 (¿stats incompleto?)")
+                continue
+            rows.append(row)
+            print(f"[INFO] Profiled {exp}")
+        w.writerows(rows)
+        found = len(rows)
 
-                opcounts, total_committed, committed_branches = parse_committed_opclasses(stats_path)
-                if total_committed == 0:
-                    print(f"[WARN] {exp}: total_committed=0 (¿stats incompleto?)")
-                    continue
-                instr = aggregate_categories(opcounts, total_committed, committed_branches)
-
-                fu_counts, total_fu_busy = parse_fu_busy(stats_path)
-                fu = aggregate_fu_categories(fu_counts, total_fu_busy)
-
-                w.writerow([
-                    exp,
-                    # --- Instrucciones ---
-                    instr["total_committed"],
-                    instr["branch_cnt"], f'{instr["branch_pct"]:.2f}',
-                    instr["load_cnt"], f'{instr["load_pct"]:.2f}',
-                    instr["store_cnt"], f'{instr["store_pct"]:.2f}',
-                    instr["aluint_cnt"], f'{instr["aluint_pct"]:.2f}',
-                    instr["alufloat_cnt"], f'{instr["alufloat_pct"]:.2f}',
-                    instr["others_cnt"], f'{instr["others_pct"]:.2f}',
-                    # --- FU Busy ---
-                    fu["fu_total"],
-                    fu["fu_load"], f'{fu["fu_load_pct"]:.2f}',
-                    fu["fu_store"], f'{fu["fu_store_pct"]:.2f}',
-                    fu["fu_aluint"], f'{fu["fu_aluint_pct"]:.2f}',
-                    fu["fu_alufloat"], f'{fu["fu_alufloat_pct"]:.2f}',
-                    fu["fu_others"], f'{fu["fu_others_pct"]:.2f}',
-                ])
-                found += 1
-                print(f"[INFO] Profiled {exp}")
+    # Solo las entradas de los stats.txt actuales (la caché no crece)
+    save_parse_cache(results)
 
     print(f"\n Perfil combinado (Instrucciones + FU Busy) guardado en: {OUTPUT_CSV}")
     if found == 0:
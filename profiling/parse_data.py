@@ -1,5 +1,8 @@
 import os
 import csv
+from concurrent.futures import ProcessPoolExecutor
+
+from _common import iter_stats_files
 
 # === BASE DIRECTORIES ===
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,6 +15,17 @@ os.makedirs(STATS_DIR, exist_ok=True)
 # === CSV OUTPUT FILE ===
 csv_file = os.path.join(STATS_DIR, "results_profiling.csv")
 
+# === STATS.TXT KEYS (bytes, matched against the raw file) ===
+PREFIX_SIM_SECONDS = b"simSeconds"
+PREFIX_IPC = b"system.cpu.ipc"
+PREFIX_CPI = b"system.cpu.cpi"
+PREFIX_NUM_CYCLES = b"system.cpu.numCycles"
+KEY_DCACHE_MISSES = b"system.cpu.dcache.demandMisses::total"
+KEY_DCACHE_ACCESSES = b"system.cpu.dcache.demandAccesses::total"
+# One C-level startswith(tuple) test rejects every other line
+INTERESTING = (PREFIX_SIM_SECONDS, PREFIX_IPC, PREFIX_CPI, PREFIX_NUM_CYCLES,
+               KEY_DCACHE_MISSES, KEY_DCACHE_ACCESSES)
+
 # === FUNCTION TO PARSE STATS.TXT ===
 def extract_stats(stats_file):
     stats = {
@@ -27,55 +41,68 @@ def extract_stats(stats_file):
         print(f"[WARN] Stats file not found: {stats_file}")
         return stats
 
-    with open(stats_file, "r") as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith("simSeconds"):
-                stats["sim_seconds"] = float(line.split()[1])
-            elif line.startswith("system.cpu.ipc"):
-                stats["ipc"] = float(line.split()[1])
-            elif line.startswith("system.cpu.cpi"):
-                stats["cpi"] = float(line.split()[1])
-            elif line.startswith("system.cpu.numCycles"):
-                stats["num_cycles"] = int(line.split()[1])
-            elif "system.cpu.dcache.demandMisses::total" in line:
-                stats["dcache_misses"] = int(line.split()[1])
-            elif "system.cpu.dcache.demandAccesses::total" in line:
-                stats["dcache_accesses"] = int(line.split()[1])
+    # Read the raw bytes once and split in C (no per-line UTF-8 decode)
+    with open(stats_file, "rb") as f:
+        data = f.read()
+
+    for line in data.splitlines():
+        line = line.strip()
+        if not line.startswith(INTERESTING):
+            continue
+        if line.startswith(PREFIX_SIM_SECONDS):
+            stats["sim_seconds"] = float(line.split()[1])
+        elif line.startswith(PREFIX_IPC):
+            stats["ipc"] = float(line.split()[1])
+        elif line.startswith(PREFIX_CPI):
+            stats["cpi"] = float(line.split()[1])
+        elif line.startswith(PREFIX_NUM_CYCLES):
+            stats["num_cycles"] = int(line.split()[1])
+        elif line.startswith(KEY_DCACHE_MISSES):
+            stats["dcache_misses"] = int(line.split()[1])
+        elif line.startswith(KEY_DCACHE_ACCESSES):
+            stats["dcache_accesses"] = int(line.split()[1])
     return stats
 
-# === CREATE RESULTS CSV FILE ===
-with open(csv_file, "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow([
-        "experiment",
-        "sim_seconds",
-        "ipc",
-        "cpi",
-        "num_cycles",
-        "dcache_misses",
-        "dcache_accesses"
-    ])
-
-    # === RECURSIVELY SEARCH ALL stats.txt FILES ===
-    for root, dirs, files in os.walk(STATS_DIR):
-        if "stats.txt" in files:
-            stats_path = os.path.join(root, "stats.txt")
-            stats = extract_stats(stats_path)
-
-            # experiment name = subfolder name
-            experiment_name = os.path.basename(root)
-
-            writer.writerow([
-                experiment_name,
-                stats["sim_seconds"],
-                stats["ipc"],
-                stats["cpi"],
-                stats["num_cycles"],
-                stats["dcache_misses"],
-                stats["dcache_accesses"]
-            ])
-
-            print(f"[INFO] Added {experiment_name} -> {stats_path}")
-
-print(f"\n Results saved to: {csv_file}")
\ No newline at end of file
+# === ONE ROW PER EXPERIMENT (runs in the worker pool) ===
+def process_one(item):
+    experiment_name, stats_path = item
+    stats = extract_stats(stats_path)
+    return [
+        experiment_name,
+        stats["sim_seconds"],
+        stats["ipc"],
+        stats["cpi"],
+        stats["num_cycles"],
+        stats["dcache_misses"],
+        stats["dcache_accesses"]
+    ]
+
+def main():
+    # === SEARCH ALL stats.txt FILES ===
+    # experiment name = subfolder name
+    paths = list(iter_stats_files(STATS_DIR))
+
+    # === CREATE RESULTS CSV FILE ===
+    with open(csv_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "experiment",
+            "sim_seconds",
+            "ipc",
+            "cpi",
+            "num_cycles",
+            "dcache_misses",
+            "dcache_accesses"
+        ])
+
+        # Parse in parallel; only this process writes, in directory order
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            for (experiment_name, stats_path), row in zip(paths, ex.map(process_one, paths, chunksize=4)):
+                writer.writerow(row)
+                print(f"[INFO] Added {experiment_name} -> {stats_path}")
+
+    print(f"\n Results saved to: {csv_file}")
+
+
+if __name__ == "__main__":
+    main()
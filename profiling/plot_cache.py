@@ -8,32 +8,56 @@ Reads `stats/cache_profile.csv` and produces two grouped bar charts side-by-side
 Saves output PNG to `profiling/cache_profile.png` by default.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import argparse
 import sys
 
-import pandas as pd
-import matplotlib.pyplot as plt
+from _common import load_data, reset_subplot_params
+
+# numpy/matplotlib are imported only once the arguments are parsed (see
+# setup_matplotlib), so --help and bad arguments return immediately
+
+# Batch PNG output: simplified paths and fast (level 1) zlib compression
+MPL_RC = {
+	"path.simplify": True,
+	"path.simplify_threshold": 1.0,
+	"agg.path.chunksize": 10000,
+}
+PNG_PIL_KWARGS = {"compress_level": 1}
+
+
+def setup_matplotlib(show: bool = False):
+	# Without --show nothing is displayed: skip the GUI backend setup
+	import matplotlib
+	if not show:
+		matplotlib.use("Agg")
+	matplotlib.rcParams.update(MPL_RC)
 
 
 DEFAULT_CSV = Path(__file__).resolve().parent / "stats" / "cache_profile.csv"
 
 
-def load_data(csv_path: Path) -> pd.DataFrame:
-	if not csv_path.exists():
-		raise FileNotFoundError(f"CSV not found: {csv_path}")
-	df = pd.read_csv(csv_path)
-	if "experiment" not in df.columns:
-		raise ValueError("CSV must contain an 'experiment' column")
-	df = df.set_index("experiment")
-	return df
+def bar_plot(ax, experiments, data, cols, width: float = 0.8):
+	# grouped bars per experiment, same layout and colors as DataFrame.plot(kind="bar")
+	import numpy as np
+	import matplotlib.pyplot as plt
+	n = len(experiments)
+	x = np.arange(n)
+	colors = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+	w = width / len(cols)
+	for i, col in enumerate(cols):
+		ax.bar(x - width / 2 + (i + 0.5) * w, data[col], w, label=col, color=colors[i % len(colors)])
+	ax.set_xlim(-width / 2 - 0.25, n - 1 + width / 2 + 0.25)
+	ax.set_xticks(x)
+	ax.set_xticklabels(experiments)
 
 
-def pick_ordered(df: pd.DataFrame, prefix_list):
-	# return columns from df that match prefixes in the given order
+def pick_ordered(data, prefix_list):
+	# return columns from data that match prefixes in the given order
 	cols = []
 	for p in prefix_list:
-		matches = [c for c in df.columns if c.startswith(p)]
+		matches = [c for c in data if c.startswith(p)]
 		# if exact match like 'icache_miss_pct' exists prefer it
 		if matches:
 			# sort to produce a stable order
@@ -42,61 +66,85 @@ def pick_ordered(df: pd.DataFrame, prefix_list):
 	return cols
 
 
-def build_plots(df: pd.DataFrame, out_path: Path, show: bool = False):
+def _encode_png(rgba, out: Path, dpi: int):
+	# PNG encoding of an already rendered figure; zlib releases the GIL, so
+	# several of these run in parallel in build_plots' thread pool
+	from PIL import Image
+	Image.fromarray(rgba).save(out, format="png", dpi=(dpi, dpi), **PNG_PIL_KWARGS)
+
+
+def _plot_bar(fig, ax, experiments, data, cols, title: str, out: Path, ylabel=None,
+		ylim=(0, 100), dpi: int = 150, show: bool = False, what: str = "plot", encoder=None):
+	# draw one per-level bar chart on the shared figure and save it to out
+	# (ylim=(0, None) keeps the top automatic). With an encoder the figure is
+	# rendered here and only the PNG encoding goes to the thread pool
+	import numpy as np
+	import matplotlib.pyplot as plt
+	ax.clear()
+	reset_subplot_params(fig)
+	bar_plot(ax, experiments, data, cols)
+	ax.set_title(title)
+	if ylabel:
+		ax.set_ylabel(ylabel)
+	ax.legend(title="Level", bbox_to_anchor=(1.05, 1), loc="upper left")
+	ax.set_xlabel("")
+	ax.set_xticklabels(ax.get_xticklabels(), rotation=30, ha="right")
+	ax.set_ylim(*ylim)
+	fig.tight_layout()
+	if encoder is None:
+		fig.savefig(out, dpi=dpi, pil_kwargs=PNG_PIL_KWARGS)
+		future = None
+	else:
+		screen_dpi = fig.dpi
+		fig.set_dpi(dpi)
+		fig.canvas.draw()
+		rgba = np.array(fig.canvas.buffer_rgba())  # copy: the figure is redrawn next
+		fig.set_dpi(screen_dpi)
+		future = encoder.submit(_encode_png, rgba, out, dpi)
+	print(f"Saved {what} to: {out}")
+	if show:
+		plt.show()
+	return future
+
+
+def build_plots(experiments, data, out_path: Path, show: bool = False, dpi: int = 150):
+	import numpy as np
+	import matplotlib.pyplot as plt
+
 	miss_prefixes = ["icache_miss_pct", "dcache_miss_pct", "l2_miss_pct", "l3_miss_pct"]
 	hit_prefixes = ["icache_hit_pct", "dcache_hit_pct", "l2_hit_pct", "l3_hit_pct"]
 
-	miss_cols = [c for c in miss_prefixes if c in df.columns]
-	hit_cols = [c for c in hit_prefixes if c in df.columns]
+	miss_cols = [c for c in miss_prefixes if c in data]
+	hit_cols = [c for c in hit_prefixes if c in data]
 
 	if not miss_cols and not hit_cols:
 		raise ValueError("No miss% or hit% columns found in CSV")
 
-	# prepare dataframes for plotting; keep experiments on x-axis
-	df_miss = df[miss_cols].apply(pd.to_numeric, errors="coerce").fillna(0) if miss_cols else None
-	df_hit = df[hit_cols].apply(pd.to_numeric, errors="coerce").fillna(0) if hit_cols else None
-
 	# Create and save percentage plots separately (one PNG per subplot)
 	out_path.parent.mkdir(parents=True, exist_ok=True)
 	base = out_path.stem
 	parent = out_path.parent
 
+	# One 8x6 figure reused for every plot (ax.clear() between them); the
+	# PNGs are encoded in parallel threads unless the plots are shown
+	fig, ax = plt.subplots(figsize=(8, 6))
+	encoder = None if show else ThreadPoolExecutor(max_workers=4)
+	pending = []
+
+	def output(suffix):
+		return parent / (base + suffix + out_path.suffix)
+
 	# Miss percentage plot
-	if df_miss is not None:
-		fig_miss, ax_miss = plt.subplots(figsize=(8, 6))
-		df_miss.plot(kind="bar", ax=ax_miss, width=0.8)
-		ax_miss.set_title("Cache miss % by level")
-		ax_miss.set_ylabel("Percent")
-		ax_miss.legend(title="Level", bbox_to_anchor=(1.05, 1), loc="upper left")
-		ax_miss.set_xlabel("")
-		ax_miss.set_xticklabels(ax_miss.get_xticklabels(), rotation=30, ha="right")
-		ax_miss.set_ylim(0, 100)
-		miss_pct_out = parent / (base + "_miss_pct" + out_path.suffix)
-		fig_miss.tight_layout()
-		fig_miss.savefig(miss_pct_out, dpi=200)
-		plt.close(fig_miss)
-		print(f"Saved plot to: {miss_pct_out}")
-		if show:
-			plt.show()
+	if miss_cols:
+		pending.append(_plot_bar(fig, ax, experiments, data, miss_cols, "Cache miss % by level",
+			output("_miss_pct"), ylabel="Percent", dpi=dpi, show=show, encoder=encoder))
 	else:
 		print("No miss% columns to plot")
 
 	# Hit percentage plot
-	if df_hit is not None:
-		fig_hit, ax_hit = plt.subplots(figsize=(8, 6))
-		df_hit.plot(kind="bar", ax=ax_hit, width=0.8)
-		ax_hit.set_title("Cache hit % by level")
-		ax_hit.legend(title="Level", bbox_to_anchor=(1.05, 1), loc="upper left")
-		ax_hit.set_xlabel("")
-		ax_hit.set_xticklabels(ax_hit.get_xticklabels(), rotation=30, ha="right")
-		ax_hit.set_ylim(0, 100)
-		hit_pct_out = parent / (base + "_hit_pct" + out_path.suffix)
-		fig_hit.tight_layout()
-		fig_hit.savefig(hit_pct_out, dpi=200)
-		plt.close(fig_hit)
-		print(f"Saved plot to: {hit_pct_out}")
-		if show:
-			plt.show()
+	if hit_cols:
+		pending.append(_plot_bar(fig, ax, experiments, data, hit_cols, "Cache hit % by level",
+			output("_hit_pct"), dpi=dpi, show=show, encoder=encoder))
 	else:
 		print("No hit% columns to plot")
 
@@ -104,83 +152,56 @@ def build_plots(df: pd.DataFrame, out_path: Path, show: bool = False):
 	# Determine available count columns
 	miss_count_cols = [c for c in [
 		"icache_misses", "dcache_misses", "l2_misses", "l3_misses"
-	] if c in df.columns]
+	] if c in data]
 	access_count_cols = [c for c in [
 		"icache_accesses", "dcache_accesses", "l2_accesses", "l3_accesses"
-	] if c in df.columns]
+	] if c in data]
 
 	# Only create counts plot if we have misses and accesses
 	if miss_count_cols and access_count_cols:
-		# prepare per-level misses dataframe
-		df_miss_counts = df[miss_count_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
-
-		# compute per-level hits where possible (accesses - misses)
+		# compute per-level hits where possible (accesses - misses), all
+		# levels in one subtraction over (levels, experiments) arrays
+		hit_levels = [c for c in miss_count_cols if c.replace("_misses", "_accesses") in data]
 		hits_data = {}
-		for miss_col in miss_count_cols:
-			base_access = miss_col.replace("_misses", "_accesses")
-			if base_access in df.columns:
-				hits_data[miss_col.replace("_misses", "_hits")] = (
-					df[base_access].astype(float).fillna(0) - df[miss_col].astype(float).fillna(0)
-				)
-		# build hits dataframe if we found any
-		df_hit_counts = pd.DataFrame(hits_data, index=df.index) if hits_data else None
+		if hit_levels:
+			misses = np.array([data[c] for c in hit_levels])
+			accesses = np.array([data[c.replace("_misses", "_accesses")] for c in hit_levels])
+			hits_data = dict(zip((c.replace("_misses", "_hits") for c in hit_levels), accesses - misses))
 
 		# Plot and save per-level misses and hits as separate PNGs
 		# Miss counts
-		if not df_miss_counts.empty:
-			fig_mc, ax_mc = plt.subplots(figsize=(8, 6))
-			df_miss_counts.plot(kind="bar", ax=ax_mc, width=0.8)
-			ax_mc.set_title("Cache misses (counts) by level")
-			ax_mc.set_ylabel("Count")
-			ax_mc.legend(title="Level", bbox_to_anchor=(1.05, 1), loc="upper left")
-			ax_mc.set_xlabel("")
-			ax_mc.set_xticklabels(ax_mc.get_xticklabels(), rotation=30, ha="right")
-			try:
-				ax_mc.set_ylim(bottom=0)
-			except Exception:
-				pass
-			miss_counts_out = parent / (base + "_miss_counts" + out_path.suffix)
-			fig_mc.tight_layout()
-			fig_mc.savefig(miss_counts_out, dpi=200)
-			plt.close(fig_mc)
-			print(f"Saved counts plot to: {miss_counts_out}")
-			if show:
-				plt.show()
+		if experiments:
+			pending.append(_plot_bar(fig, ax, experiments, data, miss_count_cols, "Cache misses (counts) by level",
+				output("_miss_counts"), ylabel="Count", ylim=(0, None), dpi=dpi, show=show,
+				what="counts plot", encoder=encoder))
 		else:
 			print("No miss count columns to plot")
 
 		# Hit counts
-		if df_hit_counts is not None and not df_hit_counts.empty:
-			fig_hc, ax_hc = plt.subplots(figsize=(8, 6))
-			df_hit_counts.plot(kind="bar", ax=ax_hc, width=0.8)
-			ax_hc.set_title("Cache hits (counts) by level")
-			ax_hc.legend(title="Level", bbox_to_anchor=(1.05, 1), loc="upper left")
-			ax_hc.set_xlabel("")
-			ax_hc.set_xticklabels(ax_hc.get_xticklabels(), rotation=30, ha="right")
-			try:
-				ax_hc.set_ylim(bottom=0)
-			except Exception:
-				pass
-			hit_counts_out = parent / (base + "_hit_counts" + out_path.suffix)
-			fig_hc.tight_layout()
-			fig_hc.savefig(hit_counts_out, dpi=200)
-			plt.close(fig_hc)
-			print(f"Saved counts plot to: {hit_counts_out}")
-			if show:
-				plt.show()
+		if hits_data and experiments:
+			pending.append(_plot_bar(fig, ax, experiments, hits_data, list(hits_data), "Cache hits (counts) by level",
+				output("_hit_counts"), ylim=(0, None), dpi=dpi, show=show, what="counts plot", encoder=encoder))
 		else:
 			print("No hit count columns to plot")
 
+	if encoder is not None:
+		encoder.shutdown(wait=True)
+		for future in pending:
+			future.result()  # re-raise encoding errors
+	plt.close(fig)
+
 
 def main(argv=None):
 	parser = argparse.ArgumentParser(description="Plot cache profile CSV")
 	parser.add_argument("--csv", type=Path, default=DEFAULT_CSV, help="Path to CSV file")
 	parser.add_argument("--out", type=Path, default=Path(__file__).resolve().parent / "cache_profile.png", help="Output PNG path")
 	parser.add_argument("--show", action="store_true", help="Show plot interactively")
+	parser.add_argument("--high-dpi", action="store_true", help="Save PNGs at 200 dpi instead of 150")
 	args = parser.parse_args(argv)
 
-	df = load_data(args.csv)
-	build_plots(df, args.out, show=args.show)
+	setup_matplotlib(args.show)
+	experiments, data = load_data(args.csv)
+	build_plots(experiments, data, args.out, show=args.show, dpi=200 if args.high_dpi else 150)
 
 
 if __name__ == "__main__":
@@ -11,36 +11,68 @@ The script saves a PNG next to this file (`instruction_fu_profile.png`) by defau
 Usage:
   python plot.py [--csv PATH] [--out PATH] [--show]
 
-Requires: pandas, matplotlib
+Requires: numpy, matplotlib
 """
 
 from pathlib import Path
 import argparse
 import sys
 
-import pandas as pd
-import matplotlib.pyplot as plt
+from _common import load_data, reset_subplot_params
 
+# numpy/matplotlib are imported only once the arguments are parsed (see
+# setup_matplotlib), so --help and bad arguments return immediately
+
+# Batch PNG output: simplified paths and fast (level 1) zlib compression
+MPL_RC = {
+	"path.simplify": True,
+	"path.simplify_threshold": 1.0,
+	"agg.path.chunksize": 10000,
+}
+PNG_PIL_KWARGS = {"compress_level": 1}
 
-DEFAULT_CSV = Path(__file__).resolve().parent / "stats" / "instruction_fu_profile.csv"
 
+def setup_matplotlib(show: bool = False):
+	# Without --show nothing is displayed: skip the GUI backend setup
+	import matplotlib
+	if not show:
+		matplotlib.use("Agg")
+	matplotlib.rcParams.update(MPL_RC)
 
-def load_data(csv_path: Path) -> pd.DataFrame:
-	if not csv_path.exists():
-		raise FileNotFoundError(f"CSV not found: {csv_path}")
-	df = pd.read_csv(csv_path)
-	if "experiment" not in df.columns:
-		raise ValueError("CSV must contain an 'experiment' column")
-	df = df.set_index("experiment")
-	return df
 
+DEFAULT_CSV = Path(__file__).resolve().parent / "stats" / "instruction_fu_profile.csv"
 
-def pick_columns(df: pd.DataFrame, candidates):
-	# return the sublist of candidates that exist in df.columns
-	return [c for c in candidates if c in df.columns]
 
+def stacked_bar_plot(ax, experiments, data, cols, colormap: str = "tab20", width: float = 0.8):
+	# stacked bars per experiment, same layout and colors as
+	# DataFrame.plot(kind="bar", stacked=True, colormap=...)
+	import numpy as np
+	import matplotlib
+	n = len(experiments)
+	x = np.arange(n)
+	cmap = matplotlib.colormaps[colormap]
+	colors = [cmap(v) for v in np.linspace(0, 1, num=len(cols))]
+	pos_prior = np.zeros(n)
+	neg_prior = np.zeros(n)
+	for col, color in zip(cols, colors):
+		y = data[col]
+		mask = y >= 0
+		ax.bar(x, y, width, bottom=np.where(mask, pos_prior, neg_prior), label=col, color=color)
+		pos_prior = pos_prior + np.where(mask, y, 0)
+		neg_prior = neg_prior + np.where(mask, 0, y)
+	ax.set_xlim(-width / 2 - 0.25, n - 1 + width / 2 + 0.25)
+	ax.set_xticks(x)
+	ax.set_xticklabels(experiments)
+
+
+def pick_columns(data, candidates):
+	# return the sublist of candidates that exist in data
+	return [c for c in candidates if c in data]
+
+
+def build_plots(experiments, data, out_path: Path, show: bool = False, dpi: int = 150):
+	import matplotlib.pyplot as plt
 
-def build_plots(df: pd.DataFrame, out_path: Path, show: bool = False):
 	instr_candidates = [
 		"branch_pct",
 		"load_pct",
@@ -58,39 +90,23 @@ def build_plots(df: pd.DataFrame, out_path: Path, show: bool = False):
 		"fu_others_pct",
 	]
 
-	instr_cols = pick_columns(df, instr_candidates)
-	fu_cols = pick_columns(df, fu_candidates)
+	instr_cols = pick_columns(data, instr_candidates)
+	fu_cols = pick_columns(data, fu_candidates)
 
 	if not instr_cols:
 		raise ValueError("No instruction percentage columns found in CSV")
 	if not fu_cols:
 		raise ValueError("No FU percentage columns found in CSV")
 
-	# Select only the needed columns and ensure numeric
-	df_instr = df[instr_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
-	df_fu = df[fu_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
-
 	# Create figure with two subplots
 	fig, axes = plt.subplots(ncols=2, figsize=(14, 6), sharey=True)
 
-	df_instr.plot(
-		kind="bar",
-		stacked=True,
-		ax=axes[0],
-		colormap="tab20",
-		width=0.8,
-	)
+	stacked_bar_plot(axes[0], experiments, data, instr_cols)
 	axes[0].set_title("Instruction mix (%)")
 	axes[0].set_ylabel("Percent")
 	axes[0].legend(title="Instr", bbox_to_anchor=(1.05, 1), loc="upper left")
 
-	df_fu.plot(
-		kind="bar",
-		stacked=True,
-		ax=axes[1],
-		colormap="tab20",
-		width=0.8,
-	)
+	stacked_bar_plot(axes[1], experiments, data, fu_cols)
 	axes[1].set_title("Functional unit busy (%)")
 	axes[1].legend(title="FU", bbox_to_anchor=(1.05, 1), loc="upper left")
 
@@ -102,49 +118,54 @@ def build_plots(df: pd.DataFrame, out_path: Path, show: bool = False):
 
 	plt.tight_layout()
 	out_path.parent.mkdir(parents=True, exist_ok=True)
-	fig.savefig(out_path, dpi=200)
+	fig.savefig(out_path, dpi=dpi, pil_kwargs=PNG_PIL_KWARGS)
 	print(f"Saved plot to: {out_path}")
 	if show:
 		plt.show()
+	plt.close(fig)
 
 	# Also save each subplot as a separate PNG: instruction percentages and FU percentages
 	base = out_path.stem
 	parent = out_path.parent
 
+	# One 8x6 figure reused for both plots (ax.clear() between them)
+	fig, ax = plt.subplots(figsize=(8, 6))
+
 	# Instruction percentage plot
-	if not df_instr.empty:
-		fig_i, ax_i = plt.subplots(figsize=(8, 6))
-		df_instr.plot(kind="bar", stacked=True, ax=ax_i, colormap="tab20", width=0.8)
-		ax_i.set_title("Instruction mix (%)")
-		ax_i.set_ylabel("Percent")
-		ax_i.legend(title="Instr", bbox_to_anchor=(1.05, 1), loc="upper left")
-		ax_i.set_xlabel("")
-		ax_i.set_xticklabels(ax_i.get_xticklabels(), rotation=30, ha="right")
-		ax_i.set_ylim(0, 100)
+	if experiments:
+		ax.clear()
+		reset_subplot_params(fig)
+		stacked_bar_plot(ax, experiments, data, instr_cols)
+		ax.set_title("Instruction mix (%)")
+		ax.set_ylabel("Percent")
+		ax.legend(title="Instr", bbox_to_anchor=(1.05, 1), loc="upper left")
+		ax.set_xlabel("")
+		ax.set_xticklabels(ax.get_xticklabels(), rotation=30, ha="right")
+		ax.set_ylim(0, 100)
 		instr_out = parent / (base + "_instr_pct" + out_path.suffix)
-		fig_i.tight_layout()
-		fig_i.savefig(instr_out, dpi=200)
-		plt.close(fig_i)
+		fig.tight_layout()
+		fig.savefig(instr_out, dpi=dpi, pil_kwargs=PNG_PIL_KWARGS)
 		print(f"Saved plot to: {instr_out}")
 		if show:
 			plt.show()
 
 	# FU percentage plot
-	if not df_fu.empty:
-		fig_f, ax_f = plt.subplots(figsize=(8, 6))
-		df_fu.plot(kind="bar", stacked=True, ax=ax_f, colormap="tab20", width=0.8)
-		ax_f.set_title("Functional unit busy (%)")
-		ax_f.legend(title="FU", bbox_to_anchor=(1.05, 1), loc="upper left")
-		ax_f.set_xlabel("")
-		ax_f.set_xticklabels(ax_f.get_xticklabels(), rotation=30, ha="right")
-		ax_f.set_ylim(0, 100)
+	if experiments:
+		ax.clear()
+		reset_subplot_params(fig)
+		stacked_bar_plot(ax, experiments, data, fu_cols)
+		ax.set_title("Functional unit busy (%)")
+		ax.legend(title="FU", bbox_to_anchor=(1.05, 1), loc="upper left")
+		ax.set_xlabel("")
+		ax.set_xticklabels(ax.get_xticklabels(), rotation=30, ha="right")
+		ax.set_ylim(0, 100)
 		fu_out = parent / (base + "_fu_pct" + out_path.suffix)
-		fig_f.tight_layout()
-		fig_f.savefig(fu_out, dpi=200)
-		plt.close(fig_f)
+		fig.tight_layout()
+		fig.savefig(fu_out, dpi=dpi, pil_kwargs=PNG_PIL_KWARGS)
 		print(f"Saved plot to: {fu_out}")
 		if show:
 			plt.show()
+	plt.close(fig)
 
 
 def main(argv=None):
@@ -152,10 +173,12 @@ def main(argv=None):
 	parser.add_argument("--csv", type=Path, default=DEFAULT_CSV, help="Path to CSV file")
 	parser.add_argument("--out", type=Path, default=Path(__file__).resolve().parent / "instruction_fu_profile.png", help="Output PNG path")
 	parser.add_argument("--show", action="store_true", help="Show plot interactively")
+	parser.add_argument("--high-dpi", action="store_true", help="Save PNGs at 200 dpi instead of 150")
 	args = parser.parse_args(argv)
 
-	df = load_data(args.csv)
-	build_plots(df, args.out, show=args.show)
+	setup_matplotlib(args.show)
+	experiments, data = load_data(args.csv)
+	build_plots(experiments, data, args.out, show=args.show, dpi=200 if args.high_dpi else 150)
 
 
 if __name__ == "__main__":
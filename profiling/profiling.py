@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 import os
+import sys
+import argparse
 import subprocess
 import shutil
 import concurrent.futures
+from pathlib import Path
 
 # === PATHS ===
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-GEM5_DIR = os.path.join(BASE_DIR, "../../gem5")
-
-gem5_bin = os.path.join(GEM5_DIR, "build/ARM/gem5.fast")
-config_script = os.path.join(GEM5_DIR, "scripts/CortexA76_scripts_gem5/CortexA76.py")
+# Path una sola vez a nivel de módulo; los paths se componen con /
+BASE_DIR = Path(__file__).resolve().parent
+GEM5_DIR = BASE_DIR / "../../gem5"
+WL_BASE = GEM5_DIR / "workloads"
+
+gem5_bin = GEM5_DIR / "build/ARM/gem5.fast"
+config_script = GEM5_DIR / "scripts/CortexA76_scripts_gem5/CortexA76.py"
+# gem5 es un binario C++: sus argumentos van como str (calculados una vez,
+# compartidos por todos los hilos)
+GEM5_BIN = str(gem5_bin)
+CONFIG_SCRIPT = str(config_script)
 
 # === WORKLOADS ===
 # Cada workload tiene su propio comando y options exactos
@@ -40,16 +49,28 @@ WORKLOADS = {
     }
 }
 
-# === OUTPUT DIRECTORIES ===
-RESULTS_DIR = os.path.join(BASE_DIR, "results")
-STATS_DIR = os.path.join(BASE_DIR, "stats")
+# Ejecutable y argv de cada workload, resueltos una sola vez al cargar el
+# módulo: los archivos de options pasan a paths completos (solo si existe
+# el archivo dentro del workload: un solo scandir del directorio)
+for wl_name, wl_data in WORKLOADS.items():
+    wl_path = WL_BASE / wl_name
+    try:
+        with os.scandir(wl_path) as entries:
+            wl_files = {e.name for e in entries}
+    except FileNotFoundError:
+        wl_files = set()
+    wl_data["exec"] = str(wl_path / wl_data["cmd"])
+    wl_data["argv"] = [str(wl_path / a) if a in wl_files else a
+                       for a in wl_data["options"].split()]
 
-os.makedirs(RESULTS_DIR, exist_ok=True)
-os.makedirs(STATS_DIR, exist_ok=True)
+# === OUTPUT DIRECTORIES ===
+RESULTS_DIR = BASE_DIR / "results"
+STATS_DIR = BASE_DIR / "stats"
 
-for wl in WORKLOADS.keys():
-    os.makedirs(os.path.join(RESULTS_DIR, wl), exist_ok=True)
-    os.makedirs(os.path.join(STATS_DIR, wl), exist_ok=True)
+# Solo los directorios raíz; los de cada workload los crea run_workload
+# cuando de verdad lo va a simular
+RESULTS_DIR.mkdir(exist_ok=True)
+STATS_DIR.mkdir(exist_ok=True)
 
 # === DEBUG: PRINT PATHS ===
 print("\n=== PATHS DE EJECUCIÓN ===")
@@ -61,67 +82,122 @@ print(f"RESULTS_DIR: {RESULTS_DIR}")
 print(f"STATS_DIR: {STATS_DIR}")
 print("============================\n")
 
+# === HARDLINK (O COPIA) DE UN ARTEFACTO ===
+def link_or_copy(src, dst):
+    # Hardlink si src y dst están en el mismo sistema de archivos (no se
+    # copia ningún byte); si no se puede (EXDEV, FS sin enlaces) se copia
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
+
+# === ÚLTIMAS LÍNEAS DEL LOG DE GEM5 ===
+def log_tail(log_path, n=40, max_bytes=8192):
+    # Solo se leen los últimos max_bytes del log (puede ocupar mucho)
+    with open(log_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - max_bytes))
+        data = f.read()
+    return b"\n".join(data.splitlines()[-n:]).decode("utf-8", "replace")
+
+# === ¿WORKLOAD YA SIMULADO? ===
+def is_done(wl_name):
+    # Hay un stats.txt no vacío en stats/<workload>
+    done = STATS_DIR / wl_name / "stats.txt"
+    return done.exists() and done.stat().st_size > 0
+
 # === FUNCTION TO RUN ONE WORKLOAD ===
-def run_workload(wl_name, wl_data):
-    print(f"Ejecutando {wl_name}...")
+def run_workload(wl_name, wl_data, force=False):
+    out_dir = RESULTS_DIR / wl_name
+    stats_dir = STATS_DIR / wl_name
 
-    wl_path = os.path.join(GEM5_DIR, "workloads", wl_name)
-    out_dir = os.path.join(RESULTS_DIR, wl_name)
-    stats_dir = os.path.join(STATS_DIR, wl_name)
+    # Ya simulado (force=True lo repite)
+    if not force and is_done(wl_name):
+        print(f"[SKIP] {wl_name}: ya existe {stats_dir / 'stats.txt'}")
+        return
+
+    print(f"Ejecutando {wl_name}...")
+    out_dir.mkdir(exist_ok=True)
+    stats_dir.mkdir(exist_ok=True)
 
-    workload_exec = os.path.join(wl_path, wl_data["cmd"])
+    workload_exec = wl_data["exec"]
 
-    # Convertir todos los archivos en options a paths completos
-    args = wl_data["options"].split()
-    args_full = []
-    for a in args:
-        # Solo hacemos path absoluto si existe el archivo dentro del workload
-        candidate = os.path.join(wl_path, a)
-        if os.path.exists(candidate):
-            args_full.append(candidate)
-        else:
-            args_full.append(a)
+    # Un solo string para --options: el script de configuración lo parte
+    # con split(), así que los tokens van tal cual (sin comillas)
+    options = " ".join(wl_data["argv"])
 
     # DEBUG: mostrar paths del workload
     print(f"[{wl_name}] Ejecutable: {workload_exec}")
-    print(f"[{wl_name}] Options completos: {' '.join(args_full)}\n")
+    print(f"[{wl_name}] Options completos: {options}\n")
 
     cmd = [
-        gem5_bin,
+        GEM5_BIN,
         f"--outdir={out_dir}",
-        config_script,
+        CONFIG_SCRIPT,
         "--cmd", workload_exec,
-        "--options", ' '.join(args_full)
+        "--options", options
     ]
 
+    # gem5 reescribe stats.txt en el sitio: se borra el de la simulación
+    # anterior para que el hardlink de stats/ no cambie si esta falla
     try:
-        subprocess.run(cmd, check=True)
+        (out_dir / "stats.txt").unlink()
+    except FileNotFoundError:
+        pass
+
+    # Salida de gem5 a un log propio: con varias simulaciones en paralelo
+    # no compiten por la terminal
+    log_path = out_dir / "gem5.log"
+    try:
+        with open(log_path, "wb", buffering=1 << 16) as log:
+            subprocess.run(cmd, check=True, stdout=log, stderr=subprocess.STDOUT)
         print(f"[OK] {wl_name} completado.")
-    except subprocess.CalledProcessError:
-        print(f"[ERROR] Falló la simulación de {wl_name}.")
+    except subprocess.CalledProcessError as e:
+        # La causa queda en el log: se muestra su final para no tener que
+        # repetir la simulación solo para verla
+        print(f"[ERROR] Falló la simulación de {wl_name} (código {e.returncode}, ver {log_path}).")
+        print(f"--- {wl_name}: últimas líneas de gem5.log ---\n{log_tail(log_path)}\n---",
+              file=sys.stderr)
         return
 
-    # Copiar stats.txt
-    stats_src = os.path.join(out_dir, "stats.txt")
-    stats_dst = os.path.join(stats_dir, "stats.txt")
-    if os.path.exists(stats_src):
-        shutil.copy(stats_src, stats_dst)
+    # Enlazar (o copiar) stats.txt
+    stats_src = out_dir / "stats.txt"
+    stats_dst = stats_dir / "stats.txt"
+    if stats_src.exists():
+        link_or_copy(stats_src, stats_dst)
     else:
         print(f"No se encontró stats.txt para {wl_name}")
 
-    # Crear archivo de información
-    info_file = os.path.join(stats_dir, "workload_info.txt")
-    with open(info_file, "w") as f:
-        f.write(f"Este archivo pertenece al workload {wl_name}\n")
-
 # === MAIN ===
 if __name__ == "__main__":
-    MAX_WORKERS = min(2, os.cpu_count())  # máximo 3 simulaciones paralelas
-
-    with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    parser = argparse.ArgumentParser(description="Simula todos los workloads con gem5")
+    parser.add_argument("--force", action="store_true",
+                        help="Volver a simular aunque ya exista stats/<workload>/stats.txt")
+    args = parser.parse_args()
+
+    # Un gem5 por núcleo (cada uno es monohilo y escribe en su --outdir);
+    # GEM5_PARALLEL fija otro límite
+    MAX_WORKERS = int(os.environ.get("GEM5_PARALLEL", 0)) or min(len(WORKLOADS), os.cpu_count() or 1)
+
+    # Hilos y no procesos: cada worker solo espera a su gem5 (subprocess.run
+    # suelta el GIL), no hace falta otro intérprete por simulación
+    # Antes de lanzar nada: un workload que hay que simular y cuyo ejecutable
+    # no existe (o no es ejecutable) se descarta aquí, sin arrancar gem5
+    to_run = {}
+    for wl_name, wl_data in WORKLOADS.items():
+        if (args.force or not is_done(wl_name)) and not os.access(wl_data["exec"], os.X_OK):
+            print(f"[ERROR] {wl_name}: no existe o no es ejecutable {wl_data['exec']}")
+            continue
+        to_run[wl_name] = wl_data
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = [
-            executor.submit(run_workload, wl_name, wl_data)
-            for wl_name, wl_data in WORKLOADS.items()
+            executor.submit(run_workload, wl_name, wl_data, args.force)
+            for wl_name, wl_data in to_run.items()
         ]
         for future in concurrent.futures.as_completed(futures):
             future.result()
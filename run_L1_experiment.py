@@ -1,29 +1,96 @@
 #!/usr/bin/env python3
 import os
 import csv
+import mmap
+import argparse
 import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-# === PATHS ===
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-GEM5_DIR = os.path.join(BASE_DIR, "../gem5")
+# === COMMAND LINE ===
+parser = argparse.ArgumentParser(description="L1 size sweep with gem5")
+parser.add_argument("--force", action="store_true",
+                    help="Re-run sizes whose m5out already has a stats.txt")
+args = parser.parse_args()
 
-gem5_bin = os.path.join(GEM5_DIR, "build/ARM/gem5.fast")
-config_script = os.path.join(GEM5_DIR, "scripts/CortexA76_scripts_gem5/CortexA76.py")
-workload = os.path.join(GEM5_DIR, "workloads/jpeg2k_dec/jpg2k_dec")
+# === PATHS ===
+# Path objects built once; everything below composes them with /
+BASE_DIR = Path(__file__).resolve().parent
+GEM5_DIR = BASE_DIR / "../gem5"
+
+gem5_bin = GEM5_DIR / "build/ARM/gem5.fast"
+config_script = GEM5_DIR / "scripts/CortexA76_scripts_gem5/CortexA76.py"
+workload = GEM5_DIR / "workloads/jpeg2k_dec/jpg2k_dec"
+# gem5 is a C++ binary: its arguments are str, converted once and shared
+# by every worker thread
+GEM5_BIN = str(gem5_bin)
+CONFIG_SCRIPT = str(config_script)
+WORKLOAD = str(workload)
 workload_args = f"-i {GEM5_DIR}/workloads/jpeg2k_dec/jpg2kdec_testfile.j2k -o image.pgm"
 
 # === OUTPUT DIRECTORIES ===
-RESULTS_DIR = os.path.join(BASE_DIR, "results")
-M5OUT_ROOT = os.path.join(RESULTS_DIR, "m5outs")
-os.makedirs(M5OUT_ROOT, exist_ok=True)
+RESULTS_DIR = BASE_DIR / "results"
+M5OUT_ROOT = RESULTS_DIR / "m5outs"
+M5OUT_ROOT.mkdir(parents=True, exist_ok=True)
 
 # === PARAMETERS TO VARY ===
 l1_sizes = ["32kB", "64kB", "128kB"]  # Only L1 cache varies
 l2_size = "512kB"  # Fixed L2 cache size
 
 # === CSV OUTPUT FILE ===
-csv_file = os.path.join(RESULTS_DIR, "results_L1_experiment.csv")
+csv_file = RESULTS_DIR / "results_L1_experiment.csv"
+
+# === STATS.TXT KEYS (bytes): key -> (field, type) ===
+STATS_FIELDS = {
+    b"simSeconds": ("sim_seconds", float),
+    b"system.cpu.ipc": ("ipc", float),
+    b"system.cpu.cpi": ("cpi", float),
+    b"system.cpu.numCycles": ("num_cycles", int),
+    b"system.cpu.dcache.demandMisses::total": ("dcache_misses", int),
+    b"system.cpu.dcache.demandAccesses::total": ("dcache_accesses", int),
+}
+
+# === HARDLINK (OR COPY) ONE ARTIFACT ===
+def link_or_copy(src, dst):
+    # hardlink when src and dst share a filesystem (no bytes copied); fall
+    # back to a copy when linking fails (EXDEV, no hardlink support)
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
+
+# All the keys above sit in the first dump block, within the first ~100 KB
+# of stats.txt; only keys missing there are searched in the rest of the file
+HEAD_BYTES = 256 * 1024
+
+# === FIND ONE STAT IN THE MAPPED FILE ===
+def find_stat(mm, key, limit=None):
+    # value token of the first line whose name is exactly key, or None;
+    # mm.find jumps straight to each "\n<key>" candidate, and only candidates
+    # starting before limit (default: the whole file) are considered
+    if limit is None:
+        limit = len(mm)
+    needle = b"\n" + key
+    pos = 0
+    if mm[:len(key)] != key:
+        pos = mm.find(needle, 0, limit)
+        if pos == -1:
+            return None
+        pos += 1
+    while True:
+        end = mm.find(b"\n", pos, pos + len(key) + 128)
+        tokens = mm[pos:end if end != -1 else pos + len(key) + 128].split(None, 2)
+        if len(tokens) > 1 and tokens[0] == key:
+            return tokens[1]
+        pos = mm.find(needle, pos, limit)
+        if pos == -1:
+            return None
+        pos += 1
 
 # === FUNCTION TO PARSE STATS.TXT ===
 def extract_stats(stats_file):
@@ -35,83 +102,116 @@ def extract_stats(stats_file):
         "dcache_misses": None,
         "dcache_accesses": None
     }
-    if not os.path.exists(stats_file):
+    if not stats_file.exists():
         print(f"  Stats file not found: {stats_file}")
         return stats
-
-    with open(stats_file) as f:
-        for line in f:
-            if line.startswith("simSeconds"):
-                stats["sim_seconds"] = float(line.split()[1])
-            elif line.startswith("system.cpu.ipc"):
-                stats["ipc"] = float(line.split()[1])
-            elif line.startswith("system.cpu.cpi"):
-                stats["cpi"] = float(line.split()[1])
-            elif line.startswith("system.cpu.numCycles"):
-                stats["num_cycles"] = int(line.split()[1])
-            elif "system.cpu.dcache.demandMisses::total" in line:
-                stats["dcache_misses"] = int(line.split()[1])
-            elif "system.cpu.dcache.demandAccesses::total" in line:
-                stats["dcache_accesses"] = int(line.split()[1])
+    if stats_file.stat().st_size == 0:
+        return stats  # mmap cannot map an empty file
+
+    # Each run dumps stats once, so the first occurrence is the value: the
+    # first HEAD_BYTES are searched and only keys missing there go on to
+    # the whole file
+    with stats_file.open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for key, (field, conv) in STATS_FIELDS.items():
+                value = find_stat(mm, key, HEAD_BYTES)
+                if value is None and len(mm) > HEAD_BYTES:
+                    value = find_stat(mm, key)
+                if value is not None:
+                    stats[field] = conv(value)
+        finally:
+            mm.close()
     return stats
 
-# === CREATE RESULTS DIRECTORY AND CSV FILE ===
-os.makedirs(RESULTS_DIR, exist_ok=True)
-with open(csv_file, "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow([
-        "L1_size",
-        "sim_seconds",
-        "ipc",
-        "cpi",
-        "num_cycles",
-        "dcache_misses",
-        "dcache_accesses"
-    ])
-
-# === RUN SIMULATIONS ===
-for size in l1_sizes:
-    out_dir = os.path.join(M5OUT_ROOT, f"L1_{size}")
-    os.makedirs(out_dir, exist_ok=True)
+# === ONE SIMULATION PER L1 SIZE (runs in a worker thread) ===
+def run_one(size):
+    out_dir = M5OUT_ROOT / f"L1_{size}"
+    out_dir.mkdir(exist_ok=True)
     print(f"\n=== Running simulation with L1={size} ===")
 
     cmd = [
-        gem5_bin,
+        GEM5_BIN,
         f"--outdir={out_dir}",
-        config_script,
-        "-c", workload,
+        CONFIG_SCRIPT,
+        "-c", WORKLOAD,
         "-o", workload_args,
         f"--l1i_size={size}",
         f"--l1d_size={size}",
         f"--l2_size={l2_size}",
     ]
 
-    subprocess.run(cmd, check=True)
+    # Skip sizes already simulated (non-empty stats.txt) unless --force
+    stats_path = out_dir / "stats.txt"
+    if not args.force and stats_path.exists() and stats_path.stat().st_size > 0:
+        print(f" [SKIP] stats.txt already in {out_dir}")
+    else:
+        # gem5 rewrites its config files in place: drop the previous ones so
+        # the links saved in RESULTS_DIR are not touched by this run
+        for name in ("config.ini", "config.dot", "config.pdf"):
+            try:
+                (out_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+        # Each size runs in its own outdir: gem5 writes the workload's
+        # relative "-o image.pgm" there instead of a cwd shared by all
+        # threads, and its output goes to a per-size log so concurrent runs
+        # do not interleave on the terminal
+        log_path = out_dir / "gem5.log"
+        try:
+            with open(log_path, "wb", buffering=1 << 16) as log:
+                subprocess.run(cmd, check=True, cwd=out_dir,
+                               stdout=log, stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError as e:
+            print(f" [ERROR] L1={size} failed (exit code {e.returncode}, see {log_path})")
+            raise
+
+    # What gem5 left in the outdir (one directory read for the copies below)
+    out_files = set(os.listdir(out_dir))
 
     # Save config.ini for each run
-    src_config = os.path.join(out_dir, "config.ini")
-    dst_config = os.path.join(RESULTS_DIR, f"config_L1_{size}.ini")
-    if os.path.exists(src_config):
-        shutil.copy(src_config, dst_config)
+    src_config = out_dir / "config.ini"
+    dst_config = RESULTS_DIR / f"config_L1_{size}.ini"
+    if "config.ini" in out_files:
+        link_or_copy(src_config, dst_config)
         print(f" Saved configuration to {dst_config}")
     else:
         print(f"  config.ini not found in {out_dir}")
 
     # Save .dot and .pdf if they exist
     for ext in ["dot", "pdf"]:
-        src = os.path.join(out_dir, f"config.{ext}")
-        dst = os.path.join(RESULTS_DIR, f"config_L1_{size}.{ext}")
-        if os.path.exists(src):
-            shutil.copy(src, dst)
+        if f"config.{ext}" in out_files:
+            src = out_dir / f"config.{ext}"
+            dst = RESULTS_DIR / f"config_L1_{size}.{ext}"
+            link_or_copy(src, dst)
             print(f" Saved {ext.upper()} to {dst}")
 
     # Extract stats
-    stats_path = os.path.join(out_dir, "stats.txt")
     stats = extract_stats(stats_path)
+    return size, stats
 
-    # Append results to CSV
-    with open(csv_file, "a", newline="") as f:
-        writer = csv.writer(f)
+# === RESULTS DIRECTORY ===
+RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+# === RUN SIMULATIONS ===
+# Independent runs (own --outdir each): one thread per size waiting on its
+# gem5. The CSV is opened once: header first, then one row per size in
+# l1_sizes order as the results come in (only this thread writes it)
+MAX_WORKERS = min(len(l1_sizes), os.cpu_count() or 1)
+with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex, \
+        csv_file.open("w", newline="") as f:
+    writer = csv.writer(f)
+    writer.writerow([
+        "L1_size",
+        "sim_seconds",
+        "ipc",
+        "cpi",
+        "num_cycles",
+        "dcache_misses",
+        "dcache_accesses"
+    ])
+    f.flush()
+    for size, stats in ex.map(run_one, l1_sizes):
         writer.writerow([
             size,
             stats.get("sim_seconds", ""),
@@ -121,6 +221,7 @@ for size in l1_sizes:
             stats.get("dcache_misses", ""),
             stats.get("dcache_accesses", "")
         ])
+        f.flush()
 
 print("\nSimulations completed.")
 print(f"Results saved to: {csv_file}")